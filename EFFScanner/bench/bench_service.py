@@ -0,0 +1,126 @@
+"""Loopback benchmark for scanService.py with simulated scan stations.
+
+    python bench_service.py [--stations 8] [--scans 200] [--storage json] [--lis-rows 20000] [--max-batch 500]
+
+Starts a ScanService on an ephemeral localhost port against generated data,
+then runs `--stations` client threads that each scan `--scans` batch IDs one
+at a time, like a barcode station. Reports throughput, per-scan latency and
+how many commits the writer needed. `--out` saves the numbers as JSON.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+
+from run_bench import Workspace, format_time  # also puts ../src on sys.path
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan service loopback benchmark")
+    parser.add_argument("--stations", type=int, default=8)
+    parser.add_argument("--scans", type=int, default=200, help="scans per station")
+    parser.add_argument("--storage", default="json", choices=("json", "journal", "sqlite"))
+    parser.add_argument("--lis-rows", type=int, default=20000)
+    parser.add_argument("--max-batch", type=int, default=500, help="scans per commit (1 = no group commit)")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    ws = Workspace(args.lis_rows, 0, args.storage)
+    try:
+        from dataManager import DataManager
+        from scanService import ScanClient, ScanService
+
+        ws.restore_history()
+        data_manager = DataManager()
+        service = ScanService(data_manager, ws.lis_folder, port=0, max_batch=args.max_batch)
+        service.start()
+        host, port = service.address
+
+        rng = random.Random(3)
+        # Mostly new IDs, with some rescans so duplicates are exercised too
+        plans = [[rng.choice(ws.batch_ids) for _ in range(args.scans)] for _ in range(args.stations)]
+        latencies = []
+        statuses = {}
+        pushes = [0]
+        lock = threading.Lock()
+        errors = []
+
+        def station(batch_ids):
+            def count_push(totals, total_count):
+                with lock:
+                    pushes[0] += 1
+
+            client = ScanClient(host, port, on_totals=count_push)
+            mine = []
+            try:
+                for batch_id in batch_ids:
+                    start = time.perf_counter()
+                    reports = client.scan([batch_id])
+                    mine.append(time.perf_counter() - start)
+                    with lock:
+                        status = reports[0]["status"]
+                        statuses[status] = statuses.get(status, 0) + 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                client.close()
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=station, args=(plan,)) for plan in plans]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        service.stop()
+        data_manager.close()
+    finally:
+        ws.close()
+
+    if errors:
+        print(f"{len(errors)} stations failed, first error: {errors[0]!r}")
+        sys.exit(1)
+
+    latencies.sort()
+    scans = len(latencies)
+    results = {
+        "stations": args.stations,
+        "scans": scans,
+        "storage": args.storage,
+        "seconds": elapsed,
+        "scans_per_second": scans / elapsed,
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_max": latencies[-1],
+        "latency_mean": statistics.fmean(latencies),
+        "commits": service.commits,
+        "ids_per_commit": service.committed_ids / service.commits if service.commits else 0,
+        "totals_pushes": pushes[0],
+        "statuses": statuses
+    }
+
+    print(f"{args.stations} stations x {args.scans} scans ({args.storage} storage): "
+          f"{scans} scans in {elapsed:.2f} s = {results['scans_per_second']:.0f} scans/s")
+    print(f"latency p50 {format_time(results['latency_p50'])}, p95 {format_time(results['latency_p95'])}, "
+          f"max {format_time(results['latency_max'])}")
+    print(f"{service.commits} commits, {results['ids_per_commit']:.1f} scans per commit, "
+          f"{pushes[0]} totals pushes, results {statuses}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
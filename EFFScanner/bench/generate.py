@@ -0,0 +1,136 @@
+"""Synthetic data for the benchmarks.
+
+    python generate.py lis OUT_DIR [--rows 20000] [--date 070725]
+    python generate.py history OUT.json [--tickets 20000]
+
+.LIS rows follow the layout find_ticket indexes: 20+ comma-separated,
+mostly quoted fields with the presses in fields 3 and 4. Histories have
+the eff_saved_data.json structure with totals that match their tickets.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from categorizer import QUANTITY_SUFFIXES, RULES, categorizer  # noqa: E402
+from LIScache import parse_line  # noqa: E402
+
+FRAME_CODES = ("K50J1B", "M20S1A", "HS0001", "H10C2B", "J50F52", "P30F1A", "F1W100", "G40M2C", "N10X1A", "S2J400")
+SPECIES = ("SANTA FE 2P", "CRAFTSMAN 3P", "HOLLOW CORE 1P", "SHAKER 5P", "FLUSH HB", "COLONIST 6P")
+CUSTOMERS = ("MCCOY NB", "ABS-RIAL", "84 LUMBER", "CARTER, LUMBER", "BMC WEST", "PRO BUILD")
+SIZES = ("024.000 X 080.000", "030.000 X 080.000", "032.000 X 079.500", "036.000 X 096.000", "028.000 X 096.000")
+LABEL = (
+    "\x1bC<CR>\x1bEW----;JELDWEN.00I<CR>\x1bP1-0-045000000;A6mmB; {species}  JELDWEN ** XDOCK **<CR>"
+    "\x1bP1-0-045000175;A4mmB;  YF{date} <LB> <BEV>   {seq} Parent Seq:{seq}  O:{order} L:{line} HC<CR>"
+    "\x1bL1-0-015000000;carbwarning<CR>\x1bEX----;<CR>\x02TZJELDWEN.00I;13<CR>\x03\x1bC1<CR>"
+)
+
+
+def lis_line(rng, date, press_a, press_b, seq):
+    frame_code = rng.choice(FRAME_CODES)
+    species = f"{frame_code} {rng.choice(SPECIES)}"
+    size = rng.choice(SIZES)
+    order = rng.randint(200000, 299999)
+    line_no = rng.randint(1, 40)
+    mm, dd, yy = date[:2], date[2:4], date[4:]
+    fields = [
+        '"YF"', f"{mm}/{dd}/{yy}", '""', f'"{press_a}"', f'"{press_b}"', str(rng.randint(1, 25)),
+        f'"{size}"', f'"{size}"', f'"{species}"', '"3 2/S"', '"3 2/S"', '""', '""',
+        '"note4"', '"note5"', '"note6"', '""', f'"{rng.choice(CUSTOMERS)}"', str(order),
+        f'"FU{rng.randint(1000, 9999)}"', f"{seq:05d}",
+        '"' + LABEL.format(species=species, date=date, seq=f"{seq:05d}", order=order, line=line_no) + '"',
+        '""', '"1-3/8 x 2/08 x 6/08"', f'"{species}"', f'"**M0{order}*"', f'"Ln:{line_no}"', f'"0{order}{line_no:03d}001YF"'
+    ]
+    return ",".join(fields)
+
+
+def write_lis(path, rows=20000, date="070725", seed=1):
+    """Write a .LIS file with `rows` lines. Returns the batch IDs it contains."""
+    rng = random.Random(seed)
+    batch_ids = []
+    seq = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        while seq < rows:
+            press_a = f"{rng.randint(1, 9999):04d}"
+            press_b = f"{rng.randint(1, 999):03d}"
+            batch_ids.append(date + press_a + press_b)
+            for _ in range(rng.randint(1, 4)):
+                seq += 1
+                f.write(lis_line(rng, date, press_a, press_b, seq) + "\n")
+    return batch_ids
+
+
+def empty_totals():
+    totals = {}
+    for suffix in dict.fromkeys(QUANTITY_SUFFIXES):
+        for _, _, prefix, _ in RULES:
+            totals[prefix + suffix] = 0
+        for _, _, prefix, splits_8ft in RULES:
+            if splits_8ft:
+                totals[prefix + suffix + " 8/0"] = 0
+    return totals
+
+
+def make_history(tickets=20000, date="070725", seed=2):
+    """An eff_saved_data.json-style dict holding `tickets` scanned tickets."""
+    rng = random.Random(seed)
+    scanned = []
+    for seq in range(1, tickets + 1):
+        press_a = f"{rng.randint(1, 9999):04d}"
+        press_b = f"{rng.randint(1, 999):03d}"
+        fields, line = parse_line(lis_line(rng, date, press_a, press_b, seq))
+        seconds = 6 * 3600 + seq * 2
+        scanned.append({
+            "batch_id": date + press_a + press_b,
+            "press_a": fields[3],
+            "press_b": fields[4],
+            "quantity": int(fields[5]),
+            "door_size": fields[7],
+            "door_species": fields[8],
+            "frame_code": fields[8].split()[0],
+            "customer": fields[17],
+            "order_number": fields[18],
+            "item_number": fields[19],
+            "sequence_number": fields[20],
+            "scan_time": f" {seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+            "original_line": line
+        })
+
+    totals, total_count = categorizer.totals(scanned)
+    category_totals = empty_totals()
+    category_totals.update(totals)
+    return {"category_totals": category_totals, "scanned_tickets": scanned, "total_count": total_count}
+
+
+def write_history(path, tickets=20000, seed=2):
+    with open(path, "w") as f:
+        json.dump(make_history(tickets, seed=seed), f, separators=(",", ":"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic EFF Scanner data")
+    sub = parser.add_subparsers(dest="kind", required=True)
+    lis = sub.add_parser("lis", help="write a .LIS file")
+    lis.add_argument("out_dir")
+    lis.add_argument("--rows", type=int, default=20000)
+    lis.add_argument("--date", default="070725", help="MMDDYY, also the file name")
+    history = sub.add_parser("history", help="write an eff_saved_data.json history")
+    history.add_argument("out")
+    history.add_argument("--tickets", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.kind == "lis":
+        os.makedirs(args.out_dir, exist_ok=True)
+        path = os.path.join(args.out_dir, f"{args.date}.LIS")
+        batch_ids = write_lis(path, args.rows, args.date)
+        print(f"Wrote {path}: {args.rows} rows, {len(batch_ids)} batch IDs")
+    else:
+        write_history(args.out, args.tickets)
+        print(f"Wrote {args.out}: {args.tickets} tickets")
+
+
+if __name__ == "__main__":
+    main()
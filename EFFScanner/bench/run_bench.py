@@ -0,0 +1,360 @@
+"""Micro-benchmarks for the scan, storage, categorize, search and table paths.
+
+    python run_bench.py run [--out results.json] [--only lis] [--repeat 5]
+                            [--lis-rows 20000] [--tickets 20000] [--storage json]
+    python run_bench.py compare BASE.json NEW.json
+
+Every benchmark runs against freshly generated data (see generate.py) in a
+temporary working folder, so the results don't depend on the local
+config.json. Times are seconds per operation; `run --out` writes them as
+JSON with the git commit, so two commits can be compared with `compare`.
+The table benchmarks need a display and are skipped without one.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, SRC_DIR)
+
+import generate  # noqa: E402
+from LIScache import lis_cache  # noqa: E402
+
+
+def measure(fn, repeat, setup=None, ops=1):
+    """Time fn() `repeat` times (after setup(), untimed). Returns seconds per op."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) / ops)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times)
+    }
+
+
+class Workspace:
+    """Temporary folder with a .LIS file, a history and a config.json pointing at them."""
+
+    def __init__(self, lis_rows, tickets, storage_mode):
+        self.root = tempfile.mkdtemp(prefix="effbench_")
+        self.lis_folder = os.path.join(self.root, "LIS_Files")
+        os.makedirs(self.lis_folder)
+        self.lis_path = os.path.join(self.lis_folder, "070725.LIS")
+        self.batch_ids = generate.write_lis(self.lis_path, lis_rows)
+
+        self.pristine = os.path.join(self.root, "history.json")
+        generate.write_history(self.pristine, tickets)
+        self.json_path = os.path.join(self.root, "eff_saved_data.json")
+
+        with open(os.path.join(self.root, "config.json"), "w") as f:
+            json.dump({
+                "data_folder": self.lis_folder,
+                "json_save_path": self.json_path,
+                "storage_mode": storage_mode,
+                "lis_watch_interval": 0,
+                "lis_retention_interval": 0
+            }, f)
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.root)
+
+    def restore_history(self):
+        """Put the generated history back and drop any journal/database built from it."""
+        for name in os.listdir(self.root):
+            if name.startswith("eff_saved_data"):
+                os.remove(os.path.join(self.root, name))
+        shutil.copyfile(self.pristine, self.json_path)
+
+    def close(self):
+        os.chdir(self.previous_cwd)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# ---- Benchmarks ---- #
+
+def bench_lis(ws, repeat, results):
+    from effscanner import EFFScanner
+    from LIScache import LISFile, scan_file
+
+    sample = ws.batch_ids[::max(1, len(ws.batch_ids) // 50)][:50]
+
+    def find_each():
+        for batch_id in sample:
+            EFFScanner(ws.lis_folder, batch_id).find_ticket()
+
+    # From an empty cache: the first lookups byte-scan, later ones index the file
+    results["lis.find_ticket_cold"] = measure(find_each, repeat, setup=lis_cache.invalidate, ops=len(sample))
+
+    def scan_each():
+        for batch_id in sample:
+            scanner = EFFScanner(ws.lis_folder, batch_id)
+            scan_file(ws.lis_path, scanner.group_press_A, scanner.group_press_B)
+
+    results["lis.scan_file"] = measure(scan_each, repeat, ops=len(sample))
+
+    def parse():
+        lis_file = LISFile(ws.lis_path)
+        lis_file.parse()
+
+    results["lis.parse_full"] = measure(parse, repeat)
+
+    lis_cache.get(ws.lis_path)
+    results["lis.find_ticket_cached"] = measure(find_each, repeat, ops=len(sample))
+    results["lis.find_many"] = measure(lambda: EFFScanner.find_many(ws.lis_folder, sample), repeat, ops=len(sample))
+
+    growing = os.path.join(ws.lis_folder, "070825.LIS")
+    appended = os.path.join(ws.root, "append.LIS")
+    generate.write_lis(appended, 200, "070825", seed=5)
+    with open(appended, "rb") as f:
+        extra = f.read()
+
+    def start_growing():
+        shutil.copyfile(ws.lis_path, growing)
+        lis_cache.get(growing)
+        with open(growing, "ab") as f:
+            f.write(extra)
+
+    results["lis.append_200_lines"] = measure(lambda: lis_cache.get(growing), repeat, setup=start_growing)
+
+
+def bench_categorize(ws, repeat, results, tickets):
+    from dataManager import DataManager
+
+    ws.restore_history()
+    dm = DataManager()
+    args = [(t["frame_code"], t["door_size"], t["quantity"]) for t in tickets]
+
+    def categorize_each():
+        for frame_code, door_size, quantity in args:
+            dm.categorize_ticket(frame_code, door_size, quantity)
+
+    results["categorize_ticket"] = measure(categorize_each, repeat, ops=len(args))
+    results["categorize_many"] = measure(lambda: dm.categorize_many(tickets), repeat, ops=len(tickets))
+    results["rebuild_totals"] = measure(lambda: dm.rebuild_totals(repair=False), repeat)
+    dm.close()
+
+
+def bench_data_manager(ws, repeat, results):
+    from dataManager import DataManager
+
+    new_tickets = generate.make_history(50, date="070825", seed=9)["scanned_tickets"]
+    state = {}
+
+    def fresh_manager():
+        if "dm" in state:
+            state["dm"].close()
+        ws.restore_history()
+        state["dm"] = DataManager()
+
+    results["dm.init_load"] = measure(fresh_manager, repeat)
+    results["dm.load_data"] = measure(lambda: state["dm"].load_data(), repeat, setup=fresh_manager)
+    results["dm.save_data"] = measure(lambda: state["dm"].save_data(), repeat, setup=fresh_manager)
+
+    # The generated history is a classic file; once saved it is paged and starts without the ticket bodies
+    fresh_manager()
+    state["dm"].save_data()
+
+    def paged_manager():
+        state["dm"].close()
+        state["dm"] = DataManager()
+
+    results["dm.init_load_paged"] = measure(paged_manager, repeat)
+    results["dm.page_in"] = measure(lambda: state["dm"].get_ticket_history(), repeat, setup=paged_manager)
+
+    def add_each():
+        for ticket in new_tickets:
+            state["dm"].add_ticket(dict(ticket))
+
+    results["dm.add_ticket"] = measure(add_each, repeat, setup=fresh_manager, ops=len(new_tickets))
+    results["dm.add_tickets_batch"] = measure(
+        lambda: state["dm"].add_tickets([dict(t) for t in new_tickets]), repeat, setup=fresh_manager, ops=len(new_tickets)
+    )
+    state["dm"].close()
+
+
+def bench_search(ws, repeat, results):
+    from dataManager import DataManager
+
+    ws.restore_history()
+    dm = DataManager()
+    index = dm.search_index
+    tickets = dm.get_ticket_history()
+    queries = ("mccoy", "fu12", "00123", "sb", "customer:lumber order:25")
+
+    results["search.build_index"] = measure(lambda: index.build(tickets), repeat)
+
+    def run_queries():
+        for query in queries:
+            dm.search(query)
+
+    results["search.query"] = measure(run_queries, repeat, ops=len(queries))
+
+    sample = tickets[:1000]
+    results["search.matches"] = measure(lambda: [index.matches(t, "mccoy") for t in sample], repeat, ops=len(sample))
+    dm.close()
+
+
+def bench_table(ws, repeat, results):
+    import tkinter as tk
+    from tkinter import ttk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping table benchmarks: {e}")
+        return
+    root.withdraw()
+
+    from dataManager import DataManager
+    from ScannedTicketTable import ScannedTicketTable
+
+    ws.restore_history()
+    dm = DataManager()
+    table = ScannedTicketTable(root, None, dm)
+    table.tree = ttk.Treeview(root, columns=table.COLUMNS, show="headings")
+
+    def refresh(query):
+        table.search_query = query
+        table.refresh_table()
+        root.update_idletasks()
+
+    results["table.refresh"] = measure(lambda: refresh(""), repeat)
+    results["table.refresh_filtered"] = measure(lambda: refresh("mccoy"), repeat)
+
+    new_tickets = generate.make_history(repeat * 20, date="070825", seed=11)["scanned_tickets"]
+    batches = iter([new_tickets[i:i + 20] for i in range(0, len(new_tickets), 20)])
+
+    def queue_adds():
+        refresh("")
+        dm.add_tickets([dict(t) for t in next(batches)])
+
+    results["table.apply_20_adds"] = measure(table.apply_pending, repeat, setup=queue_adds)
+    dm.close()
+    root.destroy()
+
+
+BENCHMARKS = ("lis", "categorize", "dm", "search", "table")
+
+
+# ---- Running and comparing ---- #
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def run(args):
+    ws = Workspace(args.lis_rows, args.tickets, args.storage)
+    results = {}
+    try:
+        history = generate.make_history(args.tickets)["scanned_tickets"]
+        steps = {
+            "lis": lambda: bench_lis(ws, args.repeat, results),
+            "categorize": lambda: bench_categorize(ws, args.repeat, results, history),
+            "dm": lambda: bench_data_manager(ws, args.repeat, results),
+            "search": lambda: bench_search(ws, args.repeat, results),
+            "table": lambda: bench_table(ws, args.repeat, results),
+        }
+        for name in BENCHMARKS:
+            if args.only and args.only not in name:
+                continue
+            started = time.perf_counter()
+            steps[name]()
+            print(f"[{name}] done in {time.perf_counter() - started:.1f} s")
+    finally:
+        ws.close()
+
+    for name, result in results.items():
+        print(f"{name:<28} median {format_time(result['median']):>10}   min {format_time(result['min']):>10}")
+
+    if args.out:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "lis_rows": args.lis_rows,
+                "tickets": args.tickets,
+                "storage": args.storage
+            },
+            "results": results
+        }
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Wrote {args.out}")
+
+
+def compare(args):
+    with open(args.base, "r") as f:
+        base = json.load(f)
+    with open(args.new, "r") as f:
+        new = json.load(f)
+    print(f"base: {base['meta'].get('commit')}   new: {new['meta'].get('commit')}")
+    for name in dict.fromkeys(list(base["results"]) + list(new["results"])):
+        old_result = base["results"].get(name)
+        new_result = new["results"].get(name)
+        if old_result is None or new_result is None:
+            print(f"{name:<28} only in {'new' if old_result is None else 'base'}")
+            continue
+        ratio = new_result["median"] / old_result["median"] if old_result["median"] else float("inf")
+        print(
+            f"{name:<28} {format_time(old_result['median']):>10} -> {format_time(new_result['median']):>10}"
+            f"   x{ratio:.2f} {'faster' if ratio < 1 else 'slower'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EFF Scanner micro-benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--out", help="write the results to this JSON file")
+    run_parser.add_argument("--only", help=f"only run benchmark groups containing this text ({', '.join(BENCHMARKS)})")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--lis-rows", type=int, default=20000)
+    run_parser.add_argument("--tickets", type=int, default=20000)
+    run_parser.add_argument("--storage", default="json", choices=("json", "journal", "sqlite"))
+    compare_parser = sub.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import csv
+import mmap
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from itertools import permutations
+from timing import timings
+
+
+def parse_line(line):
+    """Split one .LIS line into fields using CSV quoting rules, or None if it isn't a ticket row."""
+    line = line.strip()
+    try:
+        fields = next(csv.reader((line,)))
+    except (csv.Error, StopIteration):
+        return None
+    if len(fields) < 21:
+        return None
+    return fields, line
+
+
+def scan_file(file_path, press_a, press_b):
+    """Rows matching both presses, found without parsing the whole file.
+
+    The file is memory-mapped and byte-searched for press_a; only lines that
+    also contain press_b are decoded and split, then checked the same way
+    LISFile.lookup would match them. Rows are (fields, line, byte offset).
+    """
+    rows = []
+    if press_a == press_b:
+        return rows  # the index only pairs distinct values
+    token, other = (press_a, press_b) if press_a else (press_b, press_a)
+    token = token.encode("utf-8")
+    other = other.encode("utf-8")
+
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return rows  # empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pos = data.find(token)
+            while pos != -1:
+                start = data.rfind(b"\n", 0, pos) + 1
+                end = data.find(b"\n", pos)
+                if end == -1:
+                    end = len(data)
+                raw = data[start:end]
+                if other in raw:
+                    row = parse_line(raw.decode("utf-8"))
+                    if row is not None:
+                        presses = row[0][1:5]
+                        if press_a in presses and press_b in presses:
+                            rows.append(row + (start,))
+                pos = data.find(token, end)
+    return rows
+
+
+class LISFile:
+    """One parsed .LIS file plus a (press_a, press_b) -> rows index.
+
+    Rows are (fields, line, byte offset of the line in the file).
+
+    The file is read incrementally: `offset` is the end of the last complete
+    line parsed, so when the scheduler appends to today's file only the new
+    bytes are read and indexed. A trailing line without its newline yet is
+    indexed provisionally and re-read on the next update. If the file was
+    truncated, replaced or rewritten (its inode changed, it got shorter, or
+    the bytes before `offset` no longer end with `last_line`), the index is
+    rebuilt from the start.
+    """
+
+    def __init__(self, file_path, mtime=None, size=None):
+        self.file_path = file_path
+        self.mtime = mtime
+        self.size = size
+        self.inode = None
+        self.index = {}
+        self.offset = 0
+        self.last_line = b""  # last complete line, including its newline
+        self.partial = None  # row indexed from an unterminated trailing line
+        self.lock = threading.Lock()
+
+    def is_fresh(self, stat):
+        return self.mtime == stat.st_mtime_ns and self.size == stat.st_size
+
+    def parse(self):
+        self.update(os.stat(self.file_path))
+
+    def update(self, stat):
+        """Index whatever was appended since the last update. Returns the number of lines read."""
+        with self.lock:
+            if self.is_fresh(stat):
+                return 0
+            with open(self.file_path, "rb") as f:
+                if not self._continues(f, stat):
+                    self._reset()
+                f.seek(self.offset)
+                data = f.read()
+
+            self._drop_partial()
+            lines = data.split(b"\n")
+            position = self.offset
+            for raw in lines[:-1]:
+                self.add_line(raw.decode("utf-8"), position)
+                position += len(raw) + 1
+            if len(lines) > 1:
+                self.last_line = lines[-2] + b"\n"
+                self.offset = position
+            if lines[-1].strip():
+                # May be cut mid-character while the file is being written
+                self.partial = self.add_line(lines[-1].decode("utf-8", errors="replace"), position)
+
+            self.mtime = stat.st_mtime_ns
+            self.size = stat.st_size
+            self.inode = stat.st_ino
+            return len(lines) - 1
+
+    def _continues(self, f, stat):
+        """True if the file still starts with everything parsed so far."""
+        if self.offset == 0:
+            return True
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            return False
+        f.seek(self.offset - len(self.last_line))
+        return f.read(len(self.last_line)) == self.last_line
+
+    def _reset(self):
+        self.index = {}
+        self.offset = 0
+        self.last_line = b""
+        self.partial = None
+
+    def _drop_partial(self):
+        row, self.partial = self.partial, None
+        if row is None:
+            return
+        for key in permutations(set(row[0][1:5]), 2):
+            rows = self.index.get(key)
+            if rows and rows[-1] is row:
+                rows.pop()
+                if not rows:
+                    del self.index[key]
+
+    def parse_archived(self, zip_path, member):
+        with zipfile.ZipFile(zip_path) as archive, archive.open(member) as raw:
+            position = 0
+            for line in raw:
+                self.add_line(line.decode("utf-8"), position)
+                position += len(line)
+
+    def add_line(self, line, offset=None):
+        row = parse_line(line)
+        if row is None:
+            return None
+        row += (offset,)
+
+        # find_ticket matches when both presses appear anywhere in fields[1:5],
+        # so index every ordered pair of those values to keep the same results.
+        for key in permutations(set(row[0][1:5]), 2):
+            self.index.setdefault(key, []).append(row)
+        return row
+
+    def lookup(self, press_a, press_b):
+        # A copy, since update() may append to the lists while a scan reads them
+        return list(self.index.get((press_a, press_b), ()))
+
+
+class LISCache:
+    """Process-wide cache of parsed .LIS files.
+
+    Entries are keyed by path and brought up to date (see LISFile.update)
+    when the file's mtime or size changes. Only the most recently used
+    `max_files` files are kept.
+
+    A lookup in a file that isn't cached byte-scans it (see scan_file)
+    instead of parsing it; once the same version of a file has been scanned
+    `index_after` times, it is parsed and indexed for the following lookups.
+    """
+
+    def __init__(self, max_files=8, index_after=2):
+        self.max_files = max_files
+        self.index_after = index_after
+        self.files = OrderedDict()
+        self.misses = {}  # path -> ((mtime_ns, size), lookups scanned without the index)
+        # Shared by scans and the background LISWatcher; parsing happens outside it
+        self.lock = threading.Lock()
+
+    def get(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            with self.lock:
+                self.files.pop(file_path, None)
+            return None
+
+        with self.lock:
+            lis_file = self.files.get(file_path)
+            if lis_file is not None and lis_file.is_fresh(stat):
+                self.files.move_to_end(file_path)
+                return lis_file
+
+        if lis_file is None:
+            lis_file = LISFile(file_path)
+        try:
+            with timings.span("lis.parse"):
+                lis_file.update(stat)
+        except OSError:
+            return None  # removed or locked between stat and open
+
+        with self.lock:
+            self.files[file_path] = lis_file
+            self.files.move_to_end(file_path)
+            self.misses.pop(file_path, None)
+            while len(self.files) > self.max_files:
+                self.files.popitem(last=False)
+        return lis_file
+
+    def get_archived(self, zip_path, member):
+        """Parse a .LIS file stored in a retention archive. Archived files never change."""
+        key = f"{zip_path}::{member}"
+        with self.lock:
+            lis_file = self.files.get(key)
+            if lis_file is not None:
+                self.files.move_to_end(key)
+                return lis_file
+
+        lis_file = LISFile(key)
+        try:
+            lis_file.parse_archived(zip_path, member)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return None
+
+        with self.lock:
+            self.files[key] = lis_file
+            while len(self.files) > self.max_files:
+                self.files.popitem(last=False)
+        return lis_file
+
+    def is_cached(self, file_path, stat):
+        with self.lock:
+            lis_file = self.files.get(file_path)
+            return lis_file is not None and lis_file.is_fresh(stat)
+
+    def lookup(self, file_path, press_a, press_b):
+        """Return the rows matching both presses, or None if the file is missing."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            with self.lock:
+                self.files.pop(file_path, None)
+                self.misses.pop(file_path, None)
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            lis_file = self.files.get(file_path)
+            if lis_file is not None and lis_file.is_fresh(stat):
+                self.files.move_to_end(file_path)
+                return lis_file.lookup(press_a, press_b)
+            if lis_file is None:
+                previous, count = self.misses.get(file_path, (None, 0))
+                count = count + 1 if previous == signature else 1
+                self.misses[file_path] = (signature, count)
+
+        # A cached file that has grown only needs its appended lines read
+        if lis_file is not None or count >= self.index_after:
+            lis_file = self.get(file_path)
+            return None if lis_file is None else lis_file.lookup(press_a, press_b)
+        try:
+            with timings.span("lis.scan"):
+                return scan_file(file_path, press_a, press_b)
+        except OSError:
+            return None
+
+    def invalidate(self, file_path=None):
+        with self.lock:
+            if file_path is None:
+                self.files.clear()
+                self.misses.clear()
+            else:
+                self.files.pop(file_path, None)
+                self.misses.pop(file_path, None)
+
+
+lis_cache = LISCache()
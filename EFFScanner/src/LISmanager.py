@@ -1,36 +1,240 @@
+import contextlib
+import json
 import os
+import shutil
+import threading
+import time
+import zipfile
+from collections import deque
 from datetime import datetime, timedelta
+from fileLock import FileLock
+from LIScache import lis_cache
 
 
+def default_archive_folder(data_folder):
+    return os.path.join(data_folder, "LIS_archive")
+
+
+def archive_zip_name(file_name):
+    """The monthly zip a .LIS file (named MMDDYY) is archived into, or None if it has no date."""
+    try:
+        file_date = datetime.strptime(file_name[:6], "%m%d%y")
+    except ValueError:
+        return None
+    return f"LIS_{file_date.strftime('%Y-%m')}.zip"
+
+
+class LISArchive:
+    """Dated zip archives of retired .LIS files plus a manifest to find them.
+
+    Files are stored in one zip per month of the file date (LIS_2025-07.zip).
+    manifest.json maps each archived file name to its zip, so scans can still
+    look up tickets from files that are no longer in the data folder.
+
+    Several stations may retire files into the same archive; writers hold
+    lock() while they change it.
+    """
+
+    def __init__(self, archive_folder):
+        self.archive_folder = archive_folder
+        self.manifest_path = os.path.join(archive_folder, "manifest.json")
+        self._manifest = {}
+        self._manifest_mtime = None
+
+    def lock(self):
+        """Cross-process lock on the archive folder (it must exist)."""
+        # A pass zips a whole month of files, so wait for it rather than time out
+        return FileLock(os.path.join(self.archive_folder, "archive.lock"), timeout=300.0)
+
+    def manifest(self, fresh=False):
+        """File name -> entry; re-read only when manifest.json changes (or `fresh`)."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return {}
+        if fresh or mtime != self._manifest_mtime:
+            with open(self.manifest_path, "r") as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def write_manifest(self, manifest):
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+            # Originals are deleted right after this, so it has to be on disk first
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    def locate(self, file_name):
+        """(zip path, member name) of an archived file, or None."""
+        entry = self.manifest().get(file_name)
+        if entry is not None:
+            return os.path.join(self.archive_folder, entry["zip"]), file_name
+
+        # Not in the manifest: a pass may have failed after zipping it, so look in its month's zip
+        zip_name = archive_zip_name(file_name)
+        if zip_name is None:
+            return None
+        zip_path = os.path.join(self.archive_folder, zip_name)
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                if file_name in archive.namelist():
+                    return zip_path, file_name
+        except (OSError, zipfile.BadZipFile):
+            pass
+        return None
+
+    def load(self, file_name, cache=lis_cache):
+        """Parsed LISFile for an archived file, or None if it was never archived."""
+        location = self.locate(file_name)
+        if location is None:
+            return None
+        return cache.get_archived(*location)
+
 
 class LISmanager:
-    
-    def __init__(self):
-        
-        from config_manager import ConfigManager
-        self.config = ConfigManager() 
-        self.data_folder_path = self.config.data_folder
-        
-        
-        
-        
+    """Background retention for the .LIS data folder.
+
+    Every `interval` seconds, files whose date (the MMDDYY file name) is
+    older than `retention_days` are compressed into the LISArchive and
+    removed from the data folder, which keeps the folder scans cheap. Each
+    run's counts and timing are kept in `reports`.
+    """
+
+    def __init__(self, config=None, cache=lis_cache):
+        if config is None:
+            from config_manager import ConfigManager
+            config = ConfigManager()
+        self.config = config
+        self.data_folder_path = config.data_folder
+        self.archive = LISArchive(config.lis_archive_folder or default_archive_folder(config.data_folder))
+        self.retention_days = config.lis_retention_days
+        self.interval = config.lis_retention_interval
+        self.cache = cache
+        self.reports = deque(maxlen=50)
+        self._stop = threading.Event()
+        self._thread = None
+
     #------------METHODS--------------------#
-    
-    def cleanUp(self):
-        
-        if os.path.exists(self.data_folder_path):
-            print("File doesn't not exist")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
             return
-        
-        cutoff_date = datetime.now - timedelta(days=13)
-            
-        for filename in os.listdir(self.data_folder_path):
-            if filename.endswith(".LIS"):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="LISmanager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.cleanUp()
+            except Exception as e:
+                print(f"LIS retention error: {e}")
+            self._stop.wait(self.interval)
+
+    def cleanUp(self):
+        """Archive every .LIS file past the retention age. Returns this run's report."""
+        start = time.perf_counter()
+        report = {"time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "scanned": 0, "kept": 0,
+                  "skipped": 0, "archived": 0, "bytes_in": 0, "bytes_out": 0, "ms": 0.0}
+
+        if not os.path.isdir(self.data_folder_path):
+            print(f"Data folder doesn't exist: {self.data_folder_path}")
+            return report
+
+        cutoff_date = datetime.now() - timedelta(days=self.retention_days)
+        expired = self._expired(cutoff_date, report)
+        if expired:
+            os.makedirs(self.archive.archive_folder, exist_ok=True)
+            # Every station runs retention on the shared data folder: one pass at a time
+            with self.archive.lock():
+                # Another station may have archived some of these while we waited
+                report.update(scanned=0, kept=0, skipped=0)
+                expired = self._expired(cutoff_date, report)
+                manifest = dict(self.archive.manifest(fresh=True))
+                for zip_name, group in expired.items():
+                    if self._stop.is_set():
+                        break
+                    self._archive_group(zip_name, group, manifest, report)
+
+        report["ms"] = (time.perf_counter() - start) * 1000
+        self.reports.append(report)
+        print(
+            f"LIS retention: {report['archived']} archived, {report['kept']} kept, "
+            f"{report['skipped']} skipped of {report['scanned']} files in {report['ms']:.0f} ms"
+        )
+        return report
+
+    def _expired(self, cutoff_date, report):
+        """Files past the cutoff date, grouped by the zip they belong in."""
+        expired = {}
+        with os.scandir(self.data_folder_path) as entries:
+            for entry in entries:
+                if not entry.name.upper().endswith(".LIS") or not entry.is_file():
+                    continue
+                report["scanned"] += 1
                 try:
-                    file_date = datetime.strptime(filename[:6], "%m%d%y")
-                    if file_date < cutoff_date:
-                        file_path = os.path.join(self.data_folder_path, filename)
-                        os.remove(file_path)
-                        print(f'Removed: {filename}')
+                    file_date = datetime.strptime(entry.name[:6], "%m%d%y")
                 except ValueError:
-                    print(f"Skipping Invalid {filename}")
\ No newline at end of file
+                    report["skipped"] += 1
+                    continue
+                if file_date >= cutoff_date:
+                    report["kept"] += 1
+                    continue
+                expired.setdefault(archive_zip_name(entry.name), []).append(entry)
+        return expired
+
+    def _archive_group(self, zip_name, group, manifest, report):
+        zip_path = os.path.join(self.archive.archive_folder, zip_name)
+        # Build the new zip beside the old one and swap it in, so a crash never leaves a half-written archive
+        temp_path = f"{zip_path}.{os.getpid()}.tmp"
+        archived = []
+        try:
+            if os.path.exists(zip_path):
+                shutil.copyfile(zip_path, temp_path)
+            with zipfile.ZipFile(temp_path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+                names = set(archive.namelist())
+                for entry in group:
+                    size = entry.stat().st_size
+                    if entry.name not in names:
+                        archive.write(entry.path, arcname=entry.name)
+                    info = archive.getinfo(entry.name)
+                    if info.file_size != size:
+                        # An older copy with the same name is already archived; keep the live file
+                        print(f"Not archiving {entry.name}: a different copy is already in {zip_name}")
+                        report["skipped"] += 1
+                        continue
+                    archived.append((entry, info))
+            os.replace(temp_path, zip_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+
+        # Record the group in the manifest before removing any original, so a later
+        # group failing can't leave deleted files the manifest doesn't know about
+        archived_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for entry, info in archived:
+            manifest[entry.name] = {"zip": zip_name, "size": info.file_size, "archived": archived_at}
+        if archived:
+            self.archive.write_manifest(manifest)
+
+        for entry, info in archived:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                print(f"Archived {entry.name} but could not remove it: {e}")
+                continue
+            self.cache.invalidate(entry.path)
+            report["archived"] += 1
+            report["bytes_in"] += info.file_size
+            report["bytes_out"] += info.compress_size
+            print(f"Archived: {entry.name} -> {zip_name}")
+
+    def get_reports(self):
+        return list(self.reports)
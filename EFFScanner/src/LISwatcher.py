@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from collections import deque
+from LIScache import lis_cache
+
+
+class LISWatcher:
+    """Background thread that polls the data folder and pre-parses .LIS files.
+
+    New or modified files are parsed into the shared LIS cache before anyone
+    scans against them, so the first scan of a new file doesn't pay for the
+    parse. Polling (os.scandir every `interval` seconds) keeps it working on
+    network shares where OS change notifications are unreliable.
+    """
+
+    def __init__(self, folder_path, interval=5.0, cache=lis_cache):
+        self.folder_path = folder_path
+        self.interval = interval
+        self.cache = cache
+        self.seen = {}  # path -> (mtime_ns, size) already handed to the cache
+        self.timings = deque(maxlen=100)  # (file name, seconds, index keys) per parse
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="LISWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"LIS watcher error: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Parse any new or changed .LIS files. Returns the number parsed."""
+        try:
+            entries = [e for e in os.scandir(self.folder_path) if e.name.upper().endswith(".LIS") and e.is_file()]
+        except OSError:
+            return 0
+
+        changed = []
+        for entry in entries:
+            stat = entry.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.seen.get(entry.path) != signature:
+                self.seen[entry.path] = signature
+                if not self.cache.is_cached(entry.path, stat):
+                    changed.append((stat.st_mtime_ns, entry))
+
+        # Newest first, and never more than the cache can hold
+        changed.sort(key=lambda item: item[0], reverse=True)
+        parsed = 0
+        for _, entry in changed[:self.cache.max_files]:
+            if self._stop.is_set():
+                break
+            start = time.perf_counter()
+            lis_file = self.cache.get(entry.path)
+            elapsed = time.perf_counter() - start
+            if lis_file is not None:
+                self.timings.append((entry.name, elapsed, len(lis_file.index)))
+                print(f"Pre-parsed {entry.name} in {elapsed * 1000:.1f} ms")
+                parsed += 1
+        return parsed
+
+    def get_timings(self):
+        return list(self.timings)
@@ -1,43 +1,182 @@
 import tkinter as tk
+from collections import deque
 from tkinter import ttk, messagebox
 from dataManager import DataManager
 
 class ScannedTicketTable:
+    # Columns shown in the table (also the ticket keys they display)
+    COLUMNS = ("batch_id", "sequence_number", "order_number", "item_number", "door_species", "quantity", "customer", "scan_time")
+    SEARCH_DELAY_MS = 150
+
     def __init__(self, root, startup_frame, data_manager, on_update_callback=None, on_delete_callback=None):
         self.root = root
         self.startup_frame = startup_frame
         self.data_manager = data_manager  # shared instance of DataManager in other classes
-        self.scanned_tickets = self.data_manager.get_ticket_history()
+        self.scanned_tickets = []  # tickets currently shown, in display order
+        self.view_uids = set()
         self.on_update_callback = on_update_callback
         self.on_delete_callback = on_delete_callback
         self.frame = None  
         self.tree = None
+        self.vsb = None
         self.sort_recent_first = True 
+        self.search_query = ""
+        self.search_after_id = None
+
+        # Only a window of rows around the viewport lives in the Treeview; the
+        # scrollbar is driven by hand so it still covers the whole list.
+        self.window_start = 0
+        self.window_size = 40
+        self.rendered = {}  # iid -> (values, tag) last written to the tree
+        self.window_tickets = {}  # iid -> ticket for the rows in the tree
+
+        # Ticket changes arrive from DataManager (possibly on the scan worker
+        # thread) and are applied on the Tk thread by apply_pending()
+        self.pending = deque()
+        self.data_manager.add_listener(self._on_data_change)
+
+    def _on_data_change(self, event, tickets):
+        if self.tree is not None:
+            self.pending.append((event, tickets))
+
+    def _matches(self, ticket):
+        return self.data_manager.search_index.matches(ticket, self.search_query)
+
+    def _row_values(self, ticket):
+        return tuple(ticket.get(field, "") for field in self.COLUMNS)
 
     def refresh_table(self):
+        """Rebuild the filtered, ordered list of tickets and redraw the visible window."""
+        self.pending.clear()
+        tickets = self.data_manager.search(self.search_query)
         if self.sort_recent_first:
-            self.scanned_tickets = list(reversed(self.scanned_tickets))
+            tickets.reverse()
+        self.scanned_tickets = tickets
+        self.view_uids = {t.uid for t in tickets}
+        self.render_window()
 
+    def apply_pending(self):
+        """Apply queued ticket changes to the table without rebuilding it. Call on the Tk thread."""
         if not self.tree:
-            return 
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-            
-        for idx, ticket in enumerate(self.scanned_tickets):
-            tag = "evenrow" if idx % 2 == 0 else "oddrow"
-            self.tree.insert("", "end", iid=str(idx), values=(
-                ticket.get("batch_id", ""),
-                ticket.get("sequence_number", ""),
-                ticket.get("order_number", ""),
-                ticket.get("item_number", ""),
-                ticket.get("door_species", ""),
-                ticket.get("quantity", ""),
-                ticket.get("customer", ""),
-                ticket.get("scan_time", "")
-            ), tags=(tag,))
+            self.pending.clear()
+            return
 
-        self.tree.tag_configure("evenrow", background="#e0e0e0")
-        self.tree.tag_configure("oddrow", background="#f5f5f5")
+        changed = False
+        while self.pending:
+            event, tickets = self.pending.popleft()
+            if event == "reload":
+                self.refresh_table()
+                changed = False
+                continue
+
+            changed = True
+            if event == "add":
+                for ticket in tickets:
+                    if ticket.uid in self.view_uids or not self._matches(ticket):
+                        continue
+                    self.view_uids.add(ticket.uid)
+                    if self.sort_recent_first:
+                        self.scanned_tickets.insert(0, ticket)
+                        if self.window_start > 0:
+                            self.window_start += 1  # keep the rows the user is looking at in place
+                    else:
+                        self.scanned_tickets.append(ticket)
+            elif event == "delete":
+                removed = {t.uid for t in tickets} & self.view_uids
+                if removed:
+                    self.scanned_tickets = [t for t in self.scanned_tickets if t.uid not in removed]
+                    self.view_uids -= removed
+            elif event == "update":
+                for ticket in tickets:
+                    if ticket.uid not in self.view_uids:
+                        continue
+                    for i, t in enumerate(self.scanned_tickets):
+                        if t.uid == ticket.uid:
+                            self.scanned_tickets[i] = ticket
+                            break
+
+        if changed:
+            self.render_window()
+
+    def render_window(self):
+        """Make the Treeview hold exactly the rows in the current window, touching only rows that changed."""
+        if not self.tree:
+            return
+
+        total = len(self.scanned_tickets)
+        self.window_start = max(0, min(self.window_start, total - self.window_size))
+        window = self.scanned_tickets[self.window_start:self.window_start + self.window_size]
+
+        wanted = {}
+        for pos, ticket in enumerate(window):
+            tag = "evenrow" if (self.window_start + pos) % 2 == 0 else "oddrow"
+            wanted[str(ticket.uid)] = (pos, self._row_values(ticket), tag)
+
+        for iid in list(self.rendered):
+            if iid not in wanted:
+                self.tree.delete(iid)
+                del self.rendered[iid]
+
+        for iid, (pos, values, tag) in wanted.items():
+            old = self.rendered.get(iid)
+            if old is None:
+                self.tree.insert("", pos, iid=iid, values=values, tags=(tag,))
+            elif old != (values, tag):
+                self.tree.item(iid, values=values, tags=(tag,))
+            self.rendered[iid] = (values, tag)
+
+        # Inserts and deletes keep the remaining rows in order; only a reorder
+        # (e.g. the sort toggle) needs rows moved
+        order = list(wanted)
+        if list(self.tree.get_children()) != order:
+            for pos, iid in enumerate(order):
+                self.tree.move(iid, "", pos)
+
+        self.window_tickets = {str(t.uid): t for t in window}
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if not self.vsb:
+            return
+        total = len(self.scanned_tickets)
+        if total <= self.window_size:
+            self.vsb.set(0.0, 1.0)
+        else:
+            first = self.window_start / total
+            last = min(self.window_start + self.window_size, total) / total
+            self.vsb.set(first, last)
+
+    def _on_scrollbar(self, action, *args):
+        total = len(self.scanned_tickets)
+        if action == "moveto":
+            self.window_start = int(float(args[0]) * total)
+        elif action == "scroll":
+            count, unit = int(args[0]), args[1]
+            self.window_start += count * (self.window_size - 1 if unit == "pages" else 1)
+        self.render_window()
+
+    def _on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4:
+            step = -3
+        elif getattr(event, "num", None) == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.window_start += step
+        self.render_window()
+        return "break"
+
+    def _on_resize(self, event):
+        # Keep enough rows in the tree to fill the visible area
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        size = max(10, event.height // row_height)
+        if size != self.window_size:
+            self.window_size = size
+            self.render_window()
+
+    def scroll_to_end(self):
+        self.window_start = max(0, len(self.scanned_tickets) - self.window_size)
+        self.render_window()
 
     def on_double_click(self, event):
         region = self.tree.identify("region", event.x, event.y)
@@ -66,8 +205,7 @@ class ScannedTicketTable:
                 if new_quantity < 0:
                     messagebox.showerror("Invalid Input", "Quantity cannot be negative.")
                     return
-                idx = int(row_id)
-                original_ticket = self.scanned_tickets[idx]
+                original_ticket = self.window_tickets[row_id]
 
                 if new_quantity == original_ticket.get("quantity"):
                     return
@@ -76,9 +214,7 @@ class ScannedTicketTable:
                 updated_ticket["quantity"] = new_quantity
 
                 self.data_manager.reprocess_ticket(original_ticket, updated_ticket)
-                
-                self.scanned_tickets = self.data_manager.get_ticket_history()
-                self.refresh_table()
+                self.apply_pending()
 
                 if self.on_update_callback:
                     self.on_update_callback(updated_ticket)
@@ -94,13 +230,10 @@ class ScannedTicketTable:
     def delete_selected_ticket(self):
         selected_item = self.tree.selection()
         if selected_item:
-            idx = int(selected_item[0])
-            ticket = self.scanned_tickets[idx]
+            ticket = self.window_tickets[selected_item[0]]
 
             self.data_manager.delete_ticket_by_data(ticket)
-         
-            self.scanned_tickets = self.data_manager.get_ticket_history()
-            self.refresh_table()
+            self.apply_pending()
             self.tree.selection_remove(self.tree.selection())  # Clear selection after delete
 
             if self.on_delete_callback:
@@ -111,11 +244,19 @@ class ScannedTicketTable:
     def back_to_menu(self):
         if self.frame:
             self.frame.destroy()
+        self.frame = None
+        self.tree = None
+        self.vsb = None
+        self.rendered = {}
+        self.window_tickets = {}
         self.startup_frame.pack(padx=20, pady=20)
 
     def toggle_sort_order(self):
+        # Reversing the list in memory is enough; render_window then only moves rows in the window
         self.sort_recent_first = not self.sort_recent_first
-        self.refresh_table()
+        self.scanned_tickets.reverse()
+        self.window_start = max(0, len(self.scanned_tickets) - self.window_start - self.window_size)
+        self.render_window()
 
 #---------------------------------------------------------#
     # Show the scanned tickets UI --------------------------------#
@@ -127,6 +268,8 @@ class ScannedTicketTable:
             self.frame.destroy()
             self.frame = None
             self.tree = None
+        self.rendered = {}
+        self.window_tickets = {}
 
         self.frame = tk.Frame(self.root, bg="#1d446b")
         self.frame.pack(padx=20, pady=20, fill="both", expand=True)
@@ -155,24 +298,24 @@ class ScannedTicketTable:
         search_entry = ttk.Entry(search_frame, textvariable=search_var)
         search_entry.pack(side="left", padx=(0, 5))
 
-        def perform_search(*args):
+        def perform_search(typed=False):
+            self.search_after_id = None
             query = search_var.get().lower()
-            if not query:
-                self.scanned_tickets = self.data_manager.get_ticket_history()
-            else:
-                all_tickets = self.data_manager.get_ticket_history()
-                self.scanned_tickets = [
-                    t for t in all_tickets
-                    if any(query in str(t.get(field, "")).lower() for field in [
-                        "batch_id", "sequence_number", "order_number", "item_number", "door_species", "quantity", "customer", "scan_time"
-                    ])
-                ]
+            if typed and query == self.search_query:
+                return  # already showing this query
+            self.search_query = query
             self.refresh_table()
             # Scroll to bottom if results exist
-            if self.tree.get_children():
-                self.tree.see(self.tree.get_children()[-1])
+            self.scroll_to_end()
+
+        # Search as you type, once typing pauses for SEARCH_DELAY_MS
+        def schedule_search(*args):
+            if self.search_after_id:
+                self.root.after_cancel(self.search_after_id)
+            self.search_after_id = self.root.after(self.SEARCH_DELAY_MS, lambda: perform_search(typed=True))
 
-        search_entry.bind("<Return>", perform_search)
+        search_var.trace_add("write", schedule_search)
+        search_entry.bind("<Return>", lambda event: perform_search())
         search_btn = ttk.Button(search_frame, text="Search", command=perform_search)
         search_btn.pack(side="left")
         clear_btn = ttk.Button(search_frame, text="Clear", command=lambda: [search_var.set(""), perform_search()])
@@ -184,14 +327,14 @@ class ScannedTicketTable:
 
         self.tree = ttk.Treeview(
             tree_frame,
-            columns=("batch_id", "sequence_number", "order_number", "item_number", "door_species", "quantity", "customer", "scan_time"),
+            columns=self.COLUMNS,
             show="headings"
         )
 
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
+        # The scrollbar moves the rendered window rather than the tree itself
+        self.vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self._on_scrollbar)
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.vsb.grid(row=0, column=1, sticky="ns")
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
@@ -223,11 +366,13 @@ class ScannedTicketTable:
         
 
         self.tree.bind("<Double-1>", self.on_double_click)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", self._on_mousewheel)
+        self.tree.bind("<Button-5>", self._on_mousewheel)
+        self.tree.bind("<Configure>", self._on_resize)
 
-        # ✅ Force reloading from file before refresh
-        self.scanned_tickets = self.data_manager.get_ticket_history()
+        self.search_query = ""
         self.refresh_table()
         # Scroll to bottom after refresh
-        if self.tree.get_children():
-            self.tree.see(self.tree.get_children()[-1])
+        self.scroll_to_end()
 
@@ -0,0 +1,123 @@
+import string
+from collections import Counter
+from functools import lru_cache
+
+
+# Category rules in the order DataManager has always applied them:
+# (frame code position, characters, category prefix, splits out 8/0 doors)
+RULES = (
+    (2, "FJW", "BF", False),   # bifold
+    (0, "MK", "MC", True),     # molded
+    (0, "H", "HC", False),     # hollow core
+    (0, "JPF", "SC", False),   # flush solid
+    (0, "G", "MS", False),     # solid core
+)
+
+# Suffix for quantities 0..20; anything else uses the bare prefix
+QUANTITY_SUFFIXES = ("",) + ("01",) + ("05",) * 4 + ("10",) * 5 + ("15",) * 5 + ("20",) * 5
+
+
+def _match_rules(first, third):
+    for position, chars, prefix, splits_8ft in RULES:
+        if (first if position == 0 else third) in chars:
+            return prefix, splits_8ft
+    return None, False
+
+
+@lru_cache(maxsize=4096)
+def is_over_7ft(door_size):
+    """True if the door height (the number after the 'X' in door_size) is over 90 inches."""
+    try:
+        parts = door_size.upper().split('X')
+        if len(parts) == 2:
+            return float(parts[1].strip()) > 90.0
+    except (AttributeError, ValueError):
+        pass
+    return False
+
+
+def totals_drift(stored_totals, stored_count, totals, total_count):
+    """{key: (stored, rebuilt)} for every total that differs, including "total_count"."""
+    drift = {}
+    for key in dict.fromkeys(list(stored_totals) + list(totals)):
+        stored = stored_totals.get(key, 0)
+        rebuilt = totals.get(key, 0)
+        if stored != rebuilt:
+            drift[key] = (stored, rebuilt)
+    if stored_count != total_count:
+        drift["total_count"] = (stored_count, total_count)
+    return drift
+
+
+class Categorizer:
+    """Category rules compiled into lookup tables.
+
+    The rule chain is evaluated once for every pair of (first, third) frame
+    code characters, so categorizing a ticket is two dict lookups plus a
+    memoized door-size parse.
+    """
+
+    def __init__(self):
+        alphabet = string.ascii_uppercase + string.digits
+        self.prefixes = {
+            (first, third): _match_rules(first, third)
+            for first in alphabet
+            for third in alphabet + " "
+        }
+
+    def prefix_for(self, frame_code):
+        first = frame_code[0].upper()
+        third = frame_code[2].upper() if len(frame_code) > 2 else " "
+        rule = self.prefixes.get((first, third))
+        if rule is None:
+            rule = self.prefixes[(first, third)] = _match_rules(first, third)
+        return rule
+
+    def categorize(self, frame_code, door_size, quantity):
+        if not frame_code:
+            return None
+        prefix, splits_8ft = self.prefix_for(frame_code)
+        if prefix is None:
+            return None
+
+        key = prefix + (QUANTITY_SUFFIXES[quantity] if 0 <= quantity <= 20 else "")
+        if splits_8ft and is_over_7ft(door_size):
+            key += " 8/0"
+        return key
+
+    def categorize_many(self, tickets):
+        """Category key (or None) for each ticket, in order, in one pass."""
+        categorize = self.categorize
+        keys = []
+        for ticket in tickets:
+            try:
+                quantity = int(ticket.get("quantity", 1))
+            except (TypeError, ValueError):
+                quantity = 1
+            keys.append(categorize(ticket.get("frame_code"), ticket.get("door_size"), quantity))
+        return keys
+
+    def totals(self, tickets):
+        """Recompute (category totals, total door count) from a ticket history.
+
+        Tickets are first grouped by (frame code, door size, quantity); a
+        year of scans has only a few thousand distinct groups, so each group
+        is categorized once and weighted by its size.
+        """
+        groups = Counter((t.get("frame_code"), t.get("door_size"), t.get("quantity", 1)) for t in tickets)
+        totals = Counter()
+        total_count = 0
+        for (frame_code, door_size, quantity), count in groups.items():
+            try:
+                quantity = int(quantity)
+            except (TypeError, ValueError):
+                quantity = 1
+            doors = quantity * count
+            total_count += doors
+            key = self.categorize(frame_code, door_size, quantity)
+            if key:
+                totals[key] += doors
+        return totals, total_count
+
+
+categorizer = Categorizer()
@@ -0,0 +1,100 @@
+"""Headless scanning without the Tk GUI.
+
+    python cli.py batches.txt            # one batch ID per line (or comma/space separated)
+    some_command | python cli.py         # or stream them on stdin
+    python cli.py day.txt --json --batch-size 1000
+
+Each batch ID is looked up and stored exactly like a scan in the app, using
+the same config.json. One line per ID goes to stdout (batch ID, result,
+updated totals), followed by the totals; scanner messages go to stderr.
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from collections import Counter
+from config_manager import ConfigManager
+from dataManager import DataManager
+from effscanner import read_batch_ids
+
+
+def read_batches(stream, batch_size):
+    """Yield lists of up to batch_size batch IDs as they are read."""
+    batch = []
+    for line in stream:
+        batch.extend(read_batch_ids(line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def print_report(report, as_json):
+    if as_json:
+        print(json.dumps({"batch_id": report["batch_id"], "status": report["status"], "updated": report["updated"]}))
+    else:
+        print(f"{report['batch_id']}\t{report['status']}\t{', '.join(report['updated'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan batch IDs without the GUI")
+    parser.add_argument("input", nargs="?", default="-", help="file of batch IDs (default: stdin)")
+    parser.add_argument("--folder", help="folder with the .LIS files (default: data_folder from config.json)")
+    parser.add_argument("--batch-size", type=int, default=500, help="batch IDs stored per storage write")
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of tab-separated text")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    parser.add_argument("--rebuild-totals", action="store_true", help="recompute the totals from the history afterwards and report drift")
+    args = parser.parse_args(argv)
+
+    folder_path = args.folder or ConfigManager().data_folder
+    if not folder_path:
+        parser.error("no data folder: pass --folder or set data_folder in config.json")
+
+    data_manager = DataManager()
+    statuses = Counter()
+    started = time.perf_counter()
+    stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        for batch_ids in read_batches(stream, max(1, args.batch_size)):
+            with contextlib.redirect_stdout(sys.stderr):
+                reports = data_manager.scan_batches(folder_path, batch_ids)
+            for report in reports:
+                statuses[report["status"]] += 1
+                if not args.quiet:
+                    print_report(report, args.json)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    drift = data_manager.rebuild_totals() if args.rebuild_totals else None
+    totals = {key: value for key, value in data_manager.get_all().items() if value}
+    total_count = data_manager.get_total()
+    data_manager.close()
+    elapsed = time.perf_counter() - started
+    processed = sum(statuses.values())
+    rate = processed / elapsed if elapsed else 0.0
+
+    if args.json:
+        summary = {"processed": processed, "statuses": dict(statuses), "seconds": round(elapsed, 3),
+                   "per_second": round(rate, 1), "totals": totals, "total_count": total_count}
+        if drift is not None:
+            summary["drift"] = {key: list(values) for key, values in drift.items()}
+        print(json.dumps(summary))
+    else:
+        print(f"Processed {processed} batch IDs in {elapsed:.2f} s ({rate:.0f}/s): "
+              + ", ".join(f"{status} {count}" for status, count in sorted(statuses.items())))
+        for key, value in totals.items():
+            print(f"  {key}: {value}")
+        print(f"Total Doors: {total_count}")
+        if drift is not None:
+            if drift:
+                print("Repaired drifted totals: " + ", ".join(f"{key} {old} -> {new}" for key, (old, new) in drift.items()))
+            else:
+                print("Totals match the ticket history.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
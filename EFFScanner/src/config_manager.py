@@ -1,7 +1,5 @@
 import os
 import json
-import tkinter as tk
-from tkinter import filedialog, messagebox
 #from LISmanager import LISmanager
 
 CONFIG_FILE = "config.json"
@@ -23,6 +21,43 @@ class ConfigManager:
         # Default LIS_Files folder (one step up from EFFScanner, in Data/LIS_Files)
         self.data_folder = os.path.join(parent_dir, "Data", "LIS_Files")
 
+        # Storage for scanned data: "json" rewrites the whole file on every scan,
+        # "journal" appends each change and compacts every N changes,
+        # "sqlite" keeps tickets in a database (next to the JSON file unless sqlite_path is set)
+        self.storage_mode = "json"
+        self.journal_compact_every = 500
+        self.sqlite_path = ""
+
+        # Write-behind: changes are held for up to write_behind_ms (or until
+        # write_behind_changes pile up) and written together (0 ms = write each change at once).
+        # fsync_policy: "always", "snapshot" (only whole-file rewrites) or "never"
+        self.write_behind_ms = 250
+        self.write_behind_changes = 50
+        self.fsync_policy = "always"
+
+        # Seconds between background polls of data_folder for new .LIS files (0 = off)
+        self.lis_watch_interval = 5
+
+        # .LIS retention: files older than lis_retention_days are zipped into
+        # lis_archive_folder ("" = LIS_archive inside data_folder), checked every
+        # lis_retention_interval seconds (0 = off)
+        self.lis_retention_days = 13
+        self.lis_retention_interval = 3600
+        self.lis_archive_folder = ""
+
+        # Folder for closed-shift archives ("" = eff_archive next to the JSON save file)
+        self.archive_folder = ""
+
+        # Recompute the totals from the ticket history on every load, repairing drift
+        # (reads every ticket, so start-up time grows with the history again)
+        self.rebuild_totals_on_load = False
+
+        # Record scan stage timings for Help > Performance
+        self.timing_enabled = False
+
+        # localhost port for scanService.py (multi-station mode)
+        self.service_port = 8765
+
         self.load_config()
         
        
@@ -33,18 +68,50 @@ class ConfigManager:
                 config = json.load(f)
                 self.data_folder = config.get("data_folder", self.data_folder)
                 self.json_save_path = config.get("json_save_path", self.json_save_path)
+                self.storage_mode = config.get("storage_mode", self.storage_mode)
+                self.journal_compact_every = config.get("journal_compact_every", self.journal_compact_every)
+                self.sqlite_path = config.get("sqlite_path", self.sqlite_path)
+                self.write_behind_ms = config.get("write_behind_ms", self.write_behind_ms)
+                self.write_behind_changes = config.get("write_behind_changes", self.write_behind_changes)
+                self.fsync_policy = config.get("fsync_policy", self.fsync_policy)
+                self.lis_watch_interval = config.get("lis_watch_interval", self.lis_watch_interval)
+                self.lis_retention_days = config.get("lis_retention_days", self.lis_retention_days)
+                self.lis_retention_interval = config.get("lis_retention_interval", self.lis_retention_interval)
+                self.lis_archive_folder = config.get("lis_archive_folder", self.lis_archive_folder)
+                self.archive_folder = config.get("archive_folder", self.archive_folder)
+                self.rebuild_totals_on_load = config.get("rebuild_totals_on_load", self.rebuild_totals_on_load)
+                self.timing_enabled = config.get("timing_enabled", self.timing_enabled)
+                self.service_port = config.get("service_port", self.service_port)
         else:
             self.save_config()  # Create config with defaults
 
     def save_config(self):
         config = {
             "data_folder": self.data_folder,
-            "json_save_path": self.json_save_path
+            "json_save_path": self.json_save_path,
+            "storage_mode": self.storage_mode,
+            "journal_compact_every": self.journal_compact_every,
+            "sqlite_path": self.sqlite_path,
+            "write_behind_ms": self.write_behind_ms,
+            "write_behind_changes": self.write_behind_changes,
+            "fsync_policy": self.fsync_policy,
+            "lis_watch_interval": self.lis_watch_interval,
+            "lis_retention_days": self.lis_retention_days,
+            "lis_retention_interval": self.lis_retention_interval,
+            "lis_archive_folder": self.lis_archive_folder,
+            "archive_folder": self.archive_folder,
+            "rebuild_totals_on_load": self.rebuild_totals_on_load,
+            "timing_enabled": self.timing_enabled,
+            "service_port": self.service_port
         }
         with open(CONFIG_FILE, "w") as f:
             json.dump(config, f, indent=4)
 
     def launch_gui(self):
+        # Imported here so headless tools (cli.py) can use ConfigManager without tkinter
+        import tkinter as tk
+        from tkinter import filedialog, messagebox
+
         settings_window = tk.Toplevel()
         settings_window.title("Set Config Paths")
         settings_window.geometry("500x300")
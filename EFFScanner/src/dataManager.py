@@ -1,19 +1,70 @@
-import json
+import contextlib
+import functools
+import itertools
 import os
+import threading
+from datetime import datetime
+from categorizer import categorizer, totals_drift
 from config_manager import ConfigManager
+from effscanner import EFFScanner, resolve_original_lines
+from storage import JsonStorage, StoredTickets, create_storage
+from rollups import ThroughputRollups, minute_of_day
+from searchIndex import TicketSearchIndex
+from shiftArchive import ShiftArchive, TIME_FORMAT
+from ticket import Ticket, dedupe_key, tickets_to_dataframe
+from timing import timings
+
+
+def locked(method):
+    """Run a DataManager method while holding its lock (scans run on a worker thread)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DataManager:
     def __init__(self):
+        self.lock = threading.RLock()
         self.config = ConfigManager()
         self.DATA_FILE = self.config.json_save_path
+        self.storage = create_storage(self.config)
+        self.archive = ShiftArchive(
+            self.config.archive_folder or os.path.join(os.path.dirname(os.path.abspath(self.DATA_FILE)), "eff_archive")
+        )
 
         # Initialize structure
         self.data = {
             "category_totals": self._init_category_totals(),
             "scanned_tickets": [],
-            "total_count": 0
+            "total_count": 0,
+            "shift_start": datetime.now().strftime(TIME_FORMAT)
         }
 
+        # (batch_id, item_number, order_number) -> number of tickets with that key
+        self.dedupe_index = {}
+
+        # Stable per-session row ids for the tables, and callbacks told about
+        # ticket changes as listener(event, tickets) with event "add",
+        # "delete", "update" or "reload". Listeners may be called from the scan
+        # worker thread, so they must not touch Tk widgets directly.
+        self._uids = itertools.count(1)
+        self.listeners = []
+
+        # Built on the first search, then kept current through the listener
+        self.search_index = TicketSearchIndex()
+        self.add_listener(self.search_index.on_change)
+
+        # Doors per 15-minute / hourly bucket by category, updated by the _apply_* mutations
+        self.rollups = ThroughputRollups()
+
+        # Write-behind: records applied in memory but not yet written, flushed
+        # after write_behind_ms or once write_behind_changes are queued
+        self.pending_records = []
+        self._flush_timer = None
+        self.write_stats = {"changes": 0, "writes": 0}
+
         self.load_data()
 
     def _init_category_totals(self):
@@ -28,34 +79,297 @@ class DataManager:
         return {key: 0 for key in keys}
 
     def add_ticket(self, ticket_dict):
+        """Add one ticket. Returns its category key, or None if it wasn't added or has no category."""
+        status, key = self.add_tickets([ticket_dict])[0]
+        return key
+
+    @locked
+    def add_tickets(self, tickets, keys=None):
+        """Dedupe, categorize and store many tickets with a single storage write.
+
+        `keys` may hold the categories already worked out by categorize_many.
+        Returns one (status, key) pair per ticket, where status is "added",
+        "duplicate" or "invalid". With write-behind "added" holds until the
+        adds are flushed: if another instance commits the same scan first,
+        our copy is replaced by theirs. scan_batches flushes before it
+        reports.
+        """
         required_keys = ["quantity", "frame_code", "door_size"]
-        if not all(k in ticket_dict for k in required_keys):
-            print(f"Missing keys in ticket: {ticket_dict}")
+        if keys is None:
+            with timings.span("dm.categorize"):
+                keys = self.categorize_many(tickets)
+        results = []
+        records = []
+        with self._shared():
+            with timings.span("dm.dedupe"):  # duplicate checks plus the in-memory adds
+                for ticket_dict, key in zip(tickets, keys):
+                    if not all(k in ticket_dict for k in required_keys):
+                        print(f"Missing keys in ticket: {ticket_dict}")
+                        results.append(("invalid", None))
+                        continue
+
+                    if self.is_duplicate(ticket_dict):
+                        results.append(("duplicate", None))
+                        continue
+
+                    ticket = Ticket.from_dict(ticket_dict)
+                    self._apply_add(ticket, key)
+                    records.append({"op": "add", "ticket": ticket})
+                    results.append(("added", key))
+
+            if records:
+                self._persist(records)
+        return results
+
+    def scan_batches(self, folder_path, batch_ids):
+        """Look up and store a list of scanned batch IDs in one pass.
+
+        Batch IDs are grouped by .LIS file so each file is read once, and
+        all new tickets are committed with one storage write. Returns one
+        report per batch ID, in order, with "status" set to "added",
+        "duplicate", "not_found" (no matching ticket) or "file_not_found".
+        """
+        scan_time = datetime.now().strftime(" %H:%M:%S")
+        with timings.span("scan.find"):
+            scanners = EFFScanner.find_many(folder_path, batch_ids, self.config.lis_archive_folder)
+
+        reports = []
+        pending = []  # (report, ticket, quantity) waiting on add_tickets
+        for batch_id, scanner in zip(batch_ids, scanners):
+            report = {"batch_id": batch_id, "status": "added", "updated": [], "tickets": []}
+            reports.append(report)
+            if scanner.file_path is None:
+                report["status"] = "file_not_found"
+                continue
+            if not scanner.get_tickets():
+                report["status"] = "not_found"
+                continue
+
+            for ticket in scanner.get_tickets():
+                try:
+                    quantity = int(ticket["quantity"])
+                except Exception:
+                    quantity = 1
+                ticket["batch_id"] = batch_id
+                ticket["quantity"] = quantity
+                ticket["scan_time"] = scan_time
+                pending.append((report, ticket, quantity))
+
+        # Commit before reporting: left queued, another station could commit the same scan first
+        with self._shared():
+            results = self.add_tickets([ticket for _, ticket, _ in pending])
+            self._flush()
+        for (report, ticket, quantity), (status, key) in zip(pending, results):
+            if status == "added":
+                report["tickets"].append(ticket)
+                if key:
+                    report["updated"].append(f"{key} (+{quantity})")
+
+        for report in reports:
+            if report["status"] == "added" and not report["tickets"]:
+                report["status"] = "duplicate"
+        return reports
+
+    def is_duplicate(self, ticket_dict):
+        """True if a ticket with the same batch_id, item_number and order_number was already scanned."""
+        return self._dedupe_key(ticket_dict) in self.dedupe_index
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, event, tickets):
+        for callback in self.listeners:
+            callback(event, tickets)
+
+    def delete_ticket_by_data(self, ticket_to_delete):
+        with self._shared():
+            self._tickets()  # only replayed records are deferred until the history is paged in
+            self._apply_delete(ticket_to_delete)
+            self._persist([{
+                "op": "delete",
+                "ticket": {k: ticket_to_delete.get(k) for k in self.DELETE_KEYS if k in ticket_to_delete}
+            }])
+
+    def reprocess_ticket(self, old_ticket, new_ticket):
+        new_ticket = Ticket.from_dict(new_ticket)
+        with self._shared():
+            self._tickets()
+            self._apply_reprocess(old_ticket, new_ticket)
+            self._persist([{
+                "op": "reprocess",
+                "old": {k: old_ticket.get(k) for k in self.REPROCESS_KEYS if k in old_ticket},
+                "new": new_ticket
+            }])
+
+    # ---- Sharing the save file with other instances ---- #
+
+    @contextlib.contextmanager
+    def _shared(self):
+        """Hold the save file's cross-process lock, caught up with other instances' changes.
+
+        Every write goes through here: sync, then mutate, then persist, all
+        under the lock, so two stations on one save file never overwrite
+        each other and dedupe checks see both stations' scans.
+        """
+        with self.lock, self.storage.locked():
+            self._sync()
+            yield
+
+    @locked
+    def sync(self):
+        """Apply changes other instances have committed to the save file.
+
+        Returns how many records were applied, or None if the data had to be
+        reloaded in full (after another instance reset, imported or
+        compacted past what this one had seen).
+        """
+        with self.storage.locked():
+            return self._sync()
+
+    def _sync(self):
+        with timings.span("dm.sync"):
+            records = self.storage.sync()
+            tickets = self.data["scanned_tickets"]
+            if isinstance(tickets, StoredTickets) and records and (
+                    tickets.stale() or any(record.get("op") != "add" for record in records)):
+                # Not paged in yet and the stored tickets moved under us: cheaper to reload the keys
+                records = None
+            if records is None:
+                self.load_data()
+                return None
+            for record in records:
+                if record.get("op") == "add":
+                    local = self._drop_pending_add(record["ticket"])
+                    if local is not None:
+                        # We scanned it too but another instance committed it first: theirs is the stored copy
+                        edits = self._undo_add(local)
+                        self._apply_record(record)
+                        for edit in edits:
+                            self._apply_reprocess(edit["old"], edit["new"])
+                        continue
+                self._apply_record(record)
+            return len(records)
+
+    # ---- Write-behind ---- #
+
+    def _persist(self, records):
+        """Queue records for storage: written at once, or together within write_behind_ms."""
+        self.pending_records.extend(records)
+        self.write_stats["changes"] += len(records)
+        if self.config.write_behind_ms <= 0 or len(self.pending_records) >= self.config.write_behind_changes:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.config.write_behind_ms / 1000, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    @locked
+    def flush(self):
+        """Write any queued changes now."""
+        if self.pending_records:  # the timer may fire after close() already flushed
+            with self._shared():
+                self._flush()
+
+    def _flush(self):
+        self._cancel_flush()
+        if not self.pending_records:
             return
+        records, self.pending_records = self.pending_records, []
+        with timings.span("dm.persist"):
+            self.storage.append_many(self.data, records)
+        self.write_stats["writes"] += 1
+
+    def _cancel_flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _drop_pending_add(self, ticket):
+        """Remove our unwritten add of the same scan from the queue and return its ticket (or None)."""
+        key = self._dedupe_key(ticket)
+        for i, record in enumerate(self.pending_records):
+            if record["op"] == "add" and self._dedupe_key(record["ticket"]) == key:
+                del self.pending_records[i]
+                return record["ticket"]
+        return None
 
-        # Check for duplicate (same batch_id, item_number, scan_time)
-        for t in self.data["scanned_tickets"]:
-            if (
-                t.get("batch_id") == ticket_dict.get("batch_id") and
-                t.get("item_number") == ticket_dict.get("item_number") and
-                t.get("order_number") == ticket_dict.get("order_number")
-            ):
-                
-                return  
+    @locked
+    def coalesced_writes(self):
+        """How many storage writes write-behind has saved so far (changes minus writes)."""
+        return self.write_stats["changes"] - self.write_stats["writes"]
 
-        quantity = int(ticket_dict["quantity"])
-        frame_code = ticket_dict["frame_code"]
-        door_size = ticket_dict["door_size"]
+    # ---- In-memory mutations (shared by the public methods and journal replay) ---- #
 
-        key = self.categorize_ticket(frame_code, door_size, quantity)
+    # Fields a journal record needs to replay a delete or reprocess
+    # (order_number and item_number give the dedupe key, for replaying before the history is paged in)
+    DELETE_KEYS = ("batch_id", "item_number", "order_number", "scan_time", "quantity", "frame_code", "door_size")
+    REPROCESS_KEYS = ("batch_id", "item_number", "order_number", "sequence_number", "quantity", "frame_code",
+                      "door_size")
+
+    def _apply_add(self, ticket_dict, key=None):
+        quantity = int(ticket_dict["quantity"])
+        if key is None:
+            key = self.categorize_ticket(ticket_dict["frame_code"], ticket_dict["door_size"], quantity)
         if key:
             self.set_value(key, quantity)
 
+        ticket_dict.uid = next(self._uids)
         self.data["scanned_tickets"].append(ticket_dict)
+        self._index_ticket(ticket_dict)
+        self.rollups.add(ticket_dict, key)
         self.data["total_count"] = max(0, self.data["total_count"] + quantity)
-        self.save_data()
+        self._notify("add", [ticket_dict])
+        return key
 
-    def delete_ticket_by_data(self, ticket_to_delete):
+    def _undo_add(self, ticket):
+        """Take back an _apply_add whose record was never written.
+
+        If the ticket was reprocessed since, its replacement (same uid) is
+        what gets taken back, and the queued reprocess records are returned
+        so the caller can replay them on the committed copy; they stay
+        queued for the other instances. If it was deleted since, its queued
+        edits are dropped: none of them would match the committed copy.
+        """
+        tickets = self.data["scanned_tickets"]
+        if isinstance(tickets, StoredTickets):
+            tickets = tickets.tail
+        current = None
+        for i in range(len(tickets) - 1, -1, -1):
+            if tickets[i] is ticket or (ticket.uid is not None and tickets[i].uid == ticket.uid):
+                current = tickets.pop(i)
+                break
+        edits, deleted = self._pending_edits(ticket, self.pending_records)
+        if current is None or deleted:
+            self.pending_records = [r for r in self.pending_records if not any(r is edit for edit in edits)]
+            return []
+
+        quantity = int(current["quantity"])
+        key = self._ticket_key(current)
+        if key:
+            self.set_value(key, -quantity)
+        self._unindex_ticket(current)
+        self.rollups.remove(current, key)
+        self.data["total_count"] = max(0, self.data["total_count"] - quantity)
+        self._notify("delete", [current])
+        return edits
+
+    def _pending_edits(self, ticket, records):
+        """The queued reprocess and delete records that follow on from our add of `ticket`, and whether it ends deleted."""
+        edits = []
+        for record in records:
+            if record["op"] == "reprocess":
+                old = record["old"]
+                if all(old.get(k) == ticket.get(k) for k in ("batch_id", "sequence_number")):
+                    edits.append(record)
+                    ticket = record["new"]
+            elif record["op"] == "delete":
+                target = record["ticket"]
+                if all(target.get(k) == ticket.get(k) for k in ("batch_id", "item_number", "scan_time")):
+                    edits.append(record)
+                    return edits, True
+        return edits, False
+
+    def _apply_delete(self, ticket_to_delete):
         quantity = int(ticket_to_delete.get("quantity", 1))
         frame_code = ticket_to_delete.get("frame_code")
         door_size = ticket_to_delete.get("door_size")
@@ -63,20 +377,38 @@ class DataManager:
         key = self.categorize_ticket(frame_code, door_size, quantity)
         if key:
             self.set_value(key, -quantity)
+        self.data["total_count"] = max(0, self.data["total_count"] - quantity)
 
-        self.data["scanned_tickets"] = [
-            t for t in self.data["scanned_tickets"]
-            if not (
+        tickets = self.data["scanned_tickets"]
+        if isinstance(tickets, StoredTickets):
+            # Not paged in (a journal replayed at start-up): the rows go when _tickets() reads them
+            tickets.deferred.append({"op": "delete", "ticket": ticket_to_delete})
+            if "order_number" in ticket_to_delete:
+                self._unindex_ticket(ticket_to_delete)
+            return
+        removed = self._delete_rows(tickets, ticket_to_delete)
+        if removed:
+            self._notify("delete", removed)
+
+    def _delete_rows(self, tickets, ticket_to_delete):
+        """Remove the tickets a delete matches from `tickets` (in place) and return them."""
+        kept = []
+        removed = []
+        for t in tickets:
+            if (
                 t.get("batch_id") == ticket_to_delete.get("batch_id") and
                 t.get("item_number") == ticket_to_delete.get("item_number") and
                 t.get("scan_time") == ticket_to_delete.get("scan_time")
-            )
-        ]
-
-        self.data["total_count"] = max(0, self.data["total_count"] - quantity)
-        self.save_data()
-
-    def reprocess_ticket(self, old_ticket, new_ticket):
+            ):
+                self._unindex_ticket(t)
+                self.rollups.remove(t, self._ticket_key(t))
+                removed.append(t)
+            else:
+                kept.append(t)
+        tickets[:] = kept
+        return removed
+
+    def _apply_reprocess(self, old_ticket, new_ticket):
         old_quantity = int(old_ticket.get("quantity", 1))
         old_key = self.categorize_ticket(old_ticket["frame_code"], old_ticket["door_size"], old_quantity)
         if old_key:
@@ -86,17 +418,122 @@ class DataManager:
         new_key = self.categorize_ticket(new_ticket["frame_code"], new_ticket["door_size"], new_quantity)
         if new_key:
             self.set_value(new_key, new_quantity)
+        self.data["total_count"] += new_quantity - old_quantity
+
+        tickets = self.data["scanned_tickets"]
+        if isinstance(tickets, StoredTickets):
+            tickets.deferred.append({"op": "reprocess", "old": old_ticket, "new": new_ticket})
+            if "order_number" in old_ticket:
+                self._unindex_ticket(old_ticket)
+                self._index_ticket(new_ticket)
+            elif not self.is_duplicate(new_ticket):
+                self._index_ticket(new_ticket)
+            return
+        if self._reprocess_row(tickets, old_ticket, new_ticket, new_key):
+            self._notify("update", [new_ticket])
 
-        for i, t in enumerate(self.data["scanned_tickets"]):
+    def _reprocess_row(self, tickets, old_ticket, new_ticket, new_key):
+        """Replace the first ticket a reprocess matches with `new_ticket`. Returns whether one matched."""
+        for i, t in enumerate(tickets):
             if (
                 t.get("batch_id") == old_ticket.get("batch_id") and
                 t.get("sequence_number") == old_ticket.get("sequence_number")
             ):
-                self.data["scanned_tickets"][i] = new_ticket
-                break
+                self._unindex_ticket(t)
+                self.rollups.remove(t, self._ticket_key(t))
+                new_ticket.uid = t.uid  # same row, new contents
+                tickets[i] = new_ticket
+                self._index_ticket(new_ticket)
+                self.rollups.add(new_ticket, new_key)
+                return True
+        return False
 
-        self.data["total_count"] += new_quantity - old_quantity
-        self.save_data()
+    # ---- Duplicate index ---- #
+
+    def _dedupe_key(self, ticket):
+        return dedupe_key(ticket)
+
+    def _index_ticket(self, ticket):
+        key = self._dedupe_key(ticket)
+        self.dedupe_index[key] = self.dedupe_index.get(key, 0) + 1
+
+    def _unindex_ticket(self, ticket):
+        key = self._dedupe_key(ticket)
+        count = self.dedupe_index.get(key, 0) - 1
+        if count > 0:
+            self.dedupe_index[key] = count
+        else:
+            self.dedupe_index.pop(key, None)
+
+    def _rebuild_indexes(self):
+        self.dedupe_index = {}
+        tickets = self.data["scanned_tickets"]
+        if isinstance(tickets, StoredTickets):
+            # Keys are enough for duplicate checks; the rollups wait for _tickets()
+            for key in tickets.keys:
+                self.dedupe_index[key] = self.dedupe_index.get(key, 0) + 1
+            for t in tickets.tail:
+                self._index_ticket(t)
+            self.rollups.invalidate()
+            return
+        for t in tickets:
+            self._index_ticket(t)
+        self.rollups.rebuild(tickets, self.categorize_many(tickets))
+
+    def _tickets(self):
+        """The ticket history as a list, paging the stored tickets in the first time it's needed.
+
+        Until then data["scanned_tickets"] is the StoredTickets from
+        storage.load(), so starting up costs the same however long the
+        history is.
+        """
+        tickets = self.data["scanned_tickets"]
+        if not isinstance(tickets, StoredTickets):
+            return tickets
+        with timings.span("dm.page_in"), self.storage.locked():
+            stored = tickets.read()
+            if stored is None:
+                # Another instance replaced the save file since we loaded it
+                self.load_data()
+                return self._tickets()
+            paged = [Ticket.from_dict(t) for t in stored]
+            for t in paged:
+                t.uid = next(self._uids)
+            deferred = tickets.deferred
+            tickets = self.data["scanned_tickets"] = paged + tickets.tail
+            if deferred:
+                # Deletes and reprocesses replayed before the bodies were here; the totals already include them
+                for record in deferred:
+                    if record["op"] == "delete":
+                        self._delete_rows(tickets, record["ticket"])
+                    else:
+                        self._reprocess_row(tickets, record["old"], record["new"], None)
+                # The index was kept from keys alone meanwhile; now it can be exact
+                self.dedupe_index = {}
+                for t in tickets:
+                    self._index_ticket(t)
+            self.rollups.rebuild(tickets, self.categorize_many(tickets))
+        return tickets
+
+    def _page_in_deferred(self):
+        """Page in before a write that copies the stored pages, if changes to them are still deferred."""
+        tickets = self.data["scanned_tickets"]
+        if isinstance(tickets, StoredTickets) and tickets.deferred:
+            self._tickets()
+
+    def _ticket_key(self, ticket):
+        return self.categorize_many([ticket])[0]
+
+    def _apply_record(self, record):
+        op = record.get("op")
+        if op == "add":
+            self._apply_add(Ticket.from_dict(record["ticket"]))
+        elif op == "delete":
+            self._apply_delete(record["ticket"])
+        elif op == "reprocess":
+            self._apply_reprocess(record["old"], Ticket.from_dict(record["new"]))
+        else:
+            print(f"Skipping unknown journal record: {record}")
 
     def set_value(self, key, value):
         if key in self.data["category_totals"] and isinstance(value, (int, float)):
@@ -105,88 +542,192 @@ class DataManager:
         else:
             raise KeyError(f"Invalid key or value type: {key}, {value}")
 
+    @locked
     def get_all(self):
         return self.data["category_totals"].copy()
 
+    @locked
     def get_total(self):
         return self.data["total_count"]
 
+    @locked
+    def get_rollups(self, interval):
+        """Doors per `interval`-minute bucket as (label, {category: doors}) rows, from shift start on."""
+        first_minute = minute_of_day(self.data.get("shift_start")) or 0
+        self._tickets()  # builds the rollups if the history isn't paged in yet
+        return self.rollups.rows(interval, first_minute)
+
+    @locked
     def get_ticket_history(self):
-        return self.data["scanned_tickets"].copy()
+        return self._tickets().copy()
+
+    @locked
+    def search(self, query):
+        """Return the tickets matching a search query (see TicketSearchIndex), in history order."""
+        tickets = self._tickets()
+        if not query.strip():
+            return tickets.copy()
+        if not self.search_index.built:
+            self.search_index.build(tickets)
+        uids = self.search_index.search(query)
+        if uids is None:
+            return tickets.copy()
+        return [t for t in tickets if t.uid in uids]
 
     def reset_data(self):
+        with self._shared():
+            self._reset_data()
+
+    def _reset_data(self):
         self.data["category_totals"] = self._init_category_totals()
         self.data["scanned_tickets"] = []
         self.data["total_count"] = 0
-        self.save_data()
+        self.data["shift_start"] = datetime.now().strftime(TIME_FORMAT)
+        self.dedupe_index = {}
+        self._save_data()
         self.load_data()
 
-    def save_data(self):
-        with open(self.DATA_FILE, "w") as f:
-            json.dump(self.data, f, indent=4)
+    def rollover_shift(self):
+        """Seal the current shift into the archive and start a fresh one.
+
+        Returns the archive partition path, or None if the shift was empty.
+        The partition and its manifest entry are synced to disk before the
+        live data is cleared; if sealing fails the shift is left as it was.
+        """
+        with self._shared():
+            path = None
+            if len(self.data["scanned_tickets"]) or self.data["total_count"]:
+                self._tickets()
+                path = self.archive.seal(self.data)
+            self._reset_data()
+            return path
+
+    def rebuild_totals(self, repair=True):
+        """Recompute the totals from the ticket history.
+
+        Returns {key: (stored, rebuilt)} for every total that had drifted;
+        with repair, the rebuilt totals replace the stored ones and are saved.
+        """
+        with self._shared():
+            totals, total_count = categorizer.totals(self._tickets())
+            drift = totals_drift(self.data["category_totals"], self.data["total_count"], totals, total_count)
+            if drift and repair:
+                for key in self.data["category_totals"]:
+                    self.data["category_totals"][key] = totals.get(key, 0)
+                self.data["total_count"] = total_count
+                self._save_data()
+            return drift
+
+    def query_archive(self, start=None, end=None):
+        """Closed shifts overlapping [start, end], loading only those partitions."""
+        return self.archive.load_range(start, end)
 
+    def save_data(self):
+        with self._shared():
+            self._save_data()
+
+    def _save_data(self):
+        # A whole-data save includes everything still queued
+        self._page_in_deferred()
+        self._cancel_flush()
+        if self.pending_records:
+            self.pending_records = []
+            self.write_stats["writes"] += 1
+        with timings.span("dm.persist"):
+            self.storage.save(self.data)
+
+    @locked
     def load_data(self):
-        if os.path.exists(self.DATA_FILE):
-            with open(self.DATA_FILE, "r") as f:
-                self.data = json.load(f)
+        data, records = self.storage.load()
+        if data is not None:
+            self.data = data
+            self._load_tickets()
+        self.data.setdefault("shift_start", datetime.now().strftime(TIME_FORMAT))
+        self._rebuild_indexes()
+        for record in records:
+            self._apply_record(record)
+        # Changes still waiting to be written go back on top of what was loaded
+        pending, self.pending_records = self.pending_records, []
+        if any(record["op"] != "add" for record in pending):
+            self._tickets()  # they came from the table, which had the history paged in anyway
+        dropped = []
+        for record in pending:
+            if any(record is edit for edit in dropped):
+                continue
+            if record["op"] == "add" and self.is_duplicate(record["ticket"]):
+                # Another instance committed the same scan meanwhile; reprocesses of ours carry over to
+                # theirs, but a delete of ours can't match it, so that edit chain goes with the add
+                edits, deleted = self._pending_edits(record["ticket"], pending)
+                if deleted:
+                    dropped.extend(edits)
+                continue
+            self._apply_record(record)
+            self.pending_records.append(record)
+        # Checking the totals reads every ticket, so this option gives up the paged start-up
+        if self.config.rebuild_totals_on_load:
+            drift = self.rebuild_totals()
+            if drift:
+                print(f"Repaired drifted totals on load: {drift}")
+        self._notify("reload", [])
+
+    def _load_tickets(self):
+        if isinstance(self.data["scanned_tickets"], StoredTickets):
+            return  # paged in by _tickets()
+        self.data["scanned_tickets"] = [Ticket.from_dict(t) for t in self.data["scanned_tickets"]]
+        for t in self.data["scanned_tickets"]:
+            t.uid = next(self._uids)
+
+    @locked
+    def export_dataframe(self):
+        """Return the ticket history as a pandas DataFrame (requires pandas)."""
+        return tickets_to_dataframe(self._classic_tickets())
+
+    @locked
+    def export_json(self, path):
+        """Write the current data to a JSON file in the classic save format."""
+        data = dict(self.data, scanned_tickets=self._classic_tickets())
+        JsonStorage(path, shared=False, packed=False).save(data)
+
+    def _classic_tickets(self):
+        """Ticket dicts with original_line read back from each line_ref, as older versions saved them."""
+        tickets = self._tickets()
+        rows = []
+        for ticket, line in zip(tickets, resolve_original_lines(tickets, self.config.lis_archive_folder)):
+            row = ticket.to_dict()
+            if line is not None:
+                row.pop("line_ref", None)
+                row["original_line"] = line
+            rows.append(row)
+        return rows
+
+    def import_json(self, path):
+        """Replace the current data with a JSON save file and store it in the active backend."""
+        data, _ = JsonStorage(path, shared=False).load()
+        if data is None:
+            raise FileNotFoundError(path)
+        if isinstance(data["scanned_tickets"], StoredTickets):
+            data["scanned_tickets"] = data["scanned_tickets"].read()
+        with self._shared():
+            self.data = data
+            self._load_tickets()
+            self._rebuild_indexes()
+            self._save_data()
+            self._notify("reload", [])
+
+    def close(self):
+        """Flush anything the storage backend is still holding (call on shutdown)."""
+        # Compacting folds the journal into a snapshot, so it must include everyone's records
+        with self._shared():
+            self._flush()
+            self._page_in_deferred()
+            self.storage.close(self.data)
 
     # ---- Categorization Logic ---- #
 
-    def isDoorBifold(self, frame_code):
-        return frame_code[2].upper() in ["F", "J", "W"]
-
-    def isDoorGreaterthan7ft(self, door_size):
-        try:
-            parts = door_size.upper().split('X')
-            if len(parts) == 2:
-                height = float(parts[1].strip())
-                return height > 90.0
-        except:
-            pass
-        return False
-
-    def isDoorMCMolded(self, frame_code):
-        return frame_code[0].upper() in ["M", "K"]
-
-    def isDoorHCHollowCore(self, frame_code):
-        return frame_code[0].upper() == "H"
-
-    def isDoorSCFLushSolid(self, frame_code):
-        return frame_code[0].upper() in ["J", "P", "F"]
-
-    def isDoorMSSolidCore(self, frame_code):
-        return frame_code[0].upper() == "G"
-
     def categorize_ticket(self, frame_code, door_size, quantity):
-        if self.isDoorBifold(frame_code):
-            return self._get_quantity_key("BF", quantity)
-        if self.isDoorMCMolded(frame_code):
-            if self.isDoorGreaterthan7ft(door_size):
-                return self._get_quantity_key("MC", quantity, is_8ft=True)
-            return self._get_quantity_key("MC", quantity)
-        if self.isDoorHCHollowCore(frame_code):
-            return self._get_quantity_key("HC", quantity)
-        if self.isDoorSCFLushSolid(frame_code):
-            return self._get_quantity_key("SC", quantity)
-        if self.isDoorMSSolidCore(frame_code):
-            return self._get_quantity_key("MS", quantity)
-        return None
+        # The category rules live in categorizer.RULES, compiled into lookup tables
+        return categorizer.categorize(frame_code, door_size, quantity)
 
-    def _get_quantity_key(self, prefix, quantity, is_8ft=False):
-        if quantity == 1:
-            key = f"{prefix}01"
-        elif 2 <= quantity <= 5:
-            key = f"{prefix}05"
-        elif 6 <= quantity <= 10:
-            key = f"{prefix}10"
-        elif 11 <= quantity <= 15:
-            key = f"{prefix}15"
-        elif 16 <= quantity <= 20:
-            key = f"{prefix}20"
-        else:
-            key = prefix
-
-        if is_8ft:
-            key += " 8/0"
-
-        return key
+    def categorize_many(self, tickets):
+        """Category key (or None) for each ticket, in one pass; add_tickets accepts the result."""
+        return categorizer.categorize_many(tickets)
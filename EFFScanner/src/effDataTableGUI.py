@@ -2,9 +2,13 @@ import tkinter as tk
 from tkinter import ttk
 from dataManager import DataManager
 from effscanner import EFFScanner
+from rollups import TOTAL
 
 
 class EffDataTableGUI:
+    # (button label, rollup interval in minutes or None for the shift totals)
+    VIEWS = (("Totals", None), ("Hourly", 60), ("15 min", 15))
+
     def __init__(self, root, startup_frame, data_manager):
         self.root = root
         self.startup_frame = startup_frame
@@ -12,6 +16,8 @@ class EffDataTableGUI:
         self.data_manager = data_manager  # Use the passed-in instance
         self.data_frame = None
         self.tree = None
+        self.view = 0
+        self.rollup_version = None  # rollups version the tree last showed
 
     def toggle_filter(self, tree, filter_btn):
         self.filter_on = not self.filter_on
@@ -25,17 +31,51 @@ class EffDataTableGUI:
     def populate_tree(self, tree):
         for row in self.tree.get_children():
             self.tree.delete(row)
+        interval = self.VIEWS[self.view][1]
+        if interval:
+            self.populate_rollups(interval)
+            return
+        self.tree["displaycolumns"] = ("Key", "Value")
         data = self.data_manager.get_all()
         items = data.items()
         if self.filter_on:
             items = filter(lambda kv: kv[1] > 0, items)
         for idx, (key, value) in enumerate(items):
             tag = "evenrow" if idx % 2 == 0 else "oddrow"
-            self.tree.insert("", "end", values=(key, value), tags=(tag,))
+            self.tree.insert("", "end", iid=key, values=("", key, value), tags=(tag,))
+
+    def populate_rollups(self, interval):
+        """One row per bucket with its door total, followed by that bucket's categories."""
+        self.tree["displaycolumns"] = ("Interval", "Key", "Value")
+        self.rollup_version = self.data_manager.rollups.version
+        for idx, (label, counts) in enumerate(self.data_manager.get_rollups(interval)):
+            tag = "evenrow" if idx % 2 == 0 else "oddrow"
+            total = counts.pop(TOTAL, 0)
+            self.tree.insert("", "end", iid=label, values=(label, TOTAL, total), tags=(tag, "bucket"))
+            for key in sorted(counts):
+                self.tree.insert("", "end", iid=f"{label}|{key}", values=("", key, counts[key]), tags=(tag,))
+
+    def cycle_view(self, view_btn):
+        self.view = (self.view + 1) % len(self.VIEWS)
+        view_btn.config(text=f"View: {self.VIEWS[self.view][0]}")
+        self.populate_tree(self.tree)
 
     def refresh_if_visible(self):
-        if self.tree:
-            self.populate_tree(self.tree)
+        """Update the values that changed in place; only redraw if the filtered row set changes."""
+        if not self.tree or not self.tree.winfo_exists():
+            return
+        if self.VIEWS[self.view][1]:
+            # Rollup rows come and go with the buckets; redraw only if they changed
+            if self.data_manager.rollups.version != self.rollup_version:
+                self.populate_tree(self.tree)
+            return
+        for key, value in self.data_manager.get_all().items():
+            shown = self.tree.exists(key)
+            if self.filter_on and shown != (value > 0):
+                self.populate_tree(self.tree)
+                return
+            if shown and self.tree.set(key, "Value") != str(value):
+                self.tree.set(key, "Value", value)
 
     def show_data_ui(self):
         self.startup_frame.pack_forget()
@@ -69,6 +109,10 @@ class EffDataTableGUI:
         refresh_btn = tk.Button(header_frame, text="Refresh", command=refresh_table)
         refresh_btn.pack(side="right", padx=10, pady=10)
 
+        view_btn = tk.Button(header_frame, text=f"View: {self.VIEWS[self.view][0]}")
+        view_btn.config(command=lambda: self.cycle_view(view_btn))
+        view_btn.pack(side="right", padx=10, pady=10)
+
         tree_frame = tk.Frame(self.data_frame)
         tree_frame.pack(pady=5, fill="both", expand=True)
 
@@ -77,10 +121,12 @@ class EffDataTableGUI:
         x_scroll = tk.Scrollbar(tree_frame, orient="horizontal")
         x_scroll.pack(side="bottom", fill="x")
 
-        self.tree = ttk.Treeview(tree_frame, columns=("Key", "Value"), show="headings",
+        self.tree = ttk.Treeview(tree_frame, columns=("Interval", "Key", "Value"), show="headings",
                                  yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set, height=20)
+        self.tree.heading("Interval", text="Interval")
         self.tree.heading("Key", text="Key")
         self.tree.heading("Value", text="Value")
+        self.tree.column("Interval", width=120, anchor="center")
         self.tree.column("Key", width=120, anchor="center")
         self.tree.column("Value", width=80, anchor="center")
         self.tree.pack(fill="both", expand=True)
@@ -92,3 +138,4 @@ class EffDataTableGUI:
 
         self.tree.tag_configure("evenrow", background="#e0e0e0")
         self.tree.tag_configure("oddrow", background="#f5f5f5")
+        self.tree.tag_configure("bucket", font=("Arial", 10, "bold"))
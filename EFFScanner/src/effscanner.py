@@ -1,9 +1,15 @@
 import os
-import pandas as pd
+import zipfile
+from datetime import datetime
+from LIScache import lis_cache, parse_line
+from LISmanager import LISArchive, default_archive_folder
+from ticket import Ticket, tickets_to_dataframe
+from timing import timings
 
 class EFFScanner:
-    def __init__(self, folder_path, batch_id):
+    def __init__(self, folder_path, batch_id, archive_folder=None):
         self.folder_path = folder_path
+        self.archive_folder = archive_folder
         
         # Added this so the user could use uppercase or lowercase letter 
         # and it would still find the file and ticket and remove all Special Batch ID character "SB" or "sb"
@@ -23,41 +29,173 @@ class EFFScanner:
         self.tickets = []
 
     def find_ticket(self):
-        for file in os.listdir(self.folder_path):
-            if file == self.file_name:
-                self.file_path = os.path.join(self.folder_path, file)
-                print(f"Processing file: {self.file_path}")
-
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        fields = line.strip().split(",")
-                        search_range = [field.strip('"') for field in fields[1:5]]
-
-                        if self.group_press_A in search_range and self.group_press_B in search_range:
-                            fields = [field.strip('"') for field in fields]
-                            ticket_data = {
-                                "batch_id": self.batch_id,
-                                "press_a": fields[3],
-                                "press_b": fields[4],
-                                "quantity": fields[5],
-                                "door_size": fields[7],
-                                "door_species": fields[8],
-                                "frame_code": fields[8].strip().split()[0],
-                                "customer": fields[17],
-                                "order_number": fields[18],
-                                "item_number": fields[19],
-                                "sequence_number": fields[20],
-                                "scan_time": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "original_line": line.strip()
-                            }
-                            self.tickets.append(ticket_data)
-
-                if not self.tickets:
-                    print(f"❌ No match for '{self.batch_id}' in file.")
-                return
-
-        print(f"❌ File '{self.file_name}' not found in {self.folder_path}")
+        file_path, rows = lookup_lis(self.folder_path, self.file_name, self.group_press_A, self.group_press_B, self.archive_folder)
+        if file_path is None:
+            print(f"❌ File '{self.file_name}' not found in {self.folder_path}")
+            return
+
+        print(f"Processing file: {file_path}")
+        self._collect(file_path, rows)
+
+        if not self.tickets:
+            print(f"❌ No match for '{self.batch_id}' in file.")
+
+    @classmethod
+    def find_many(cls, folder_path, batch_ids, archive_folder=None):
+        """Run find_ticket for many batch IDs, reading each .LIS file at most once.
+
+        Returns one scanner per batch ID, in the same order. A scanner whose
+        file_path is still None had no matching file.
+        """
+        scanners = [cls(folder_path, batch_id, archive_folder) for batch_id in batch_ids]
+
+        by_file = {}
+        for scanner in scanners:
+            by_file.setdefault(scanner.file_name, []).append(scanner)
+
+        for file_name, group in by_file.items():
+            if len(group) == 1:
+                group[0].find_ticket()  # one lookup: a byte scan is cheaper than indexing the file
+                continue
+            with timings.span("lis.lookup"):
+                lis_file = load_lis(folder_path, file_name, archive_folder)
+            if lis_file is None:
+                print(f"❌ File '{file_name}' not found in {folder_path}")
+                continue
+            print(f"Processing file: {lis_file.file_path} ({len(group)} batch IDs)")
+            for scanner in group:
+                scanner._collect(lis_file.file_path, lis_file.lookup(scanner.group_press_A, scanner.group_press_B))
+
+        return scanners
+
+    def _collect(self, file_path, rows):
+        self.file_path = file_path
+
+        scan_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for fields, line, offset in rows:
+            ticket_data = Ticket(
+                batch_id=self.batch_id,
+                press_a=fields[3],
+                press_b=fields[4],
+                quantity=fields[5],
+                door_size=fields[7],
+                door_species=fields[8],
+                frame_code=fields[8].strip().split()[0],
+                customer=fields[17],
+                order_number=fields[18],
+                item_number=fields[19],
+                sequence_number=fields[20],
+                scan_time=scan_time,
+                line_ref=(file_path, offset)
+            )
+            self.tickets.append(ticket_data)
 
     def get_tickets(self):
-        """Return all extracted ticket data as a DataFrame."""
-        return pd.DataFrame(self.tickets) if self.tickets else pd.DataFrame()
+        """Return all extracted tickets as a list of Ticket records."""
+        return self.tickets
+
+    def to_dataframe(self):
+        """Return the extracted tickets as a pandas DataFrame (requires pandas)."""
+        return tickets_to_dataframe(self.tickets)
+
+
+def load_lis(folder_path, file_name, archive_folder=None):
+    """Parsed .LIS file from the data folder, falling back to the retention archive."""
+    lis_file = lis_cache.get(os.path.join(folder_path, file_name))
+    if lis_file is None:
+        lis_file = LISArchive(archive_folder or default_archive_folder(folder_path)).load(file_name)
+    return lis_file
+
+
+def lookup_lis(folder_path, file_name, press_a, press_b, archive_folder=None):
+    """(file path, rows matching both presses), falling back to the retention archive.
+
+    Returns (None, None) if the file is in neither place.
+    """
+    with timings.span("lis.lookup"):
+        file_path = os.path.join(folder_path, file_name)
+        rows = lis_cache.lookup(file_path, press_a, press_b)
+        if rows is not None:
+            return file_path, rows
+        lis_file = LISArchive(archive_folder or default_archive_folder(folder_path)).load(file_name)
+        if lis_file is None:
+            return None, None
+        return lis_file.file_path, lis_file.lookup(press_a, press_b)
+
+
+def resolve_original_lines(tickets, archive_folder=None):
+    """The .LIS row of each ticket (from its line_ref), or None where it can't be found.
+
+    Each file is opened once. Files retired by LISmanager are read from the
+    retention archive. A row whose item and sequence number no longer match
+    (the file was rewritten) is looked up again by its presses.
+    """
+    by_path = {}
+    for ticket in tickets:
+        ref = ticket.get("line_ref")
+        if ref is not None:
+            by_path.setdefault(ref[0], set()).add(ref[1])
+
+    found = {}
+    for path, offsets in by_path.items():
+        try:
+            f = _open_lis(path, archive_folder)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            continue
+        if f is None:
+            continue
+        with f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                found[(path, offset)] = f.readline().decode("utf-8", errors="replace").strip()
+
+    lines = []
+    for ticket in tickets:
+        # getattr, not get(): a Ticket's get("original_line") would call back into here
+        line = getattr(ticket, "original_line", None) if isinstance(ticket, Ticket) else ticket.get("original_line")
+        ref = ticket.get("line_ref")
+        if line is None and ref is not None:
+            line = found.get(tuple(ref))
+            if line is not None and not _same_row(parse_line(line), ticket):
+                line = _find_row(ref[0], ticket)
+        lines.append(line)
+    return lines
+
+
+def _open_lis(path, archive_folder):
+    """Binary file object for a line_ref path ("zip::member" for archived files), or None."""
+    if "::" in path:
+        zip_path, member = path.split("::", 1)
+    elif os.path.exists(path):
+        return open(path, "rb")
+    else:
+        folder, file_name = os.path.split(path)
+        location = LISArchive(archive_folder or default_archive_folder(folder)).locate(file_name)
+        if location is None:
+            return None
+        zip_path, member = location
+    archive = zipfile.ZipFile(zip_path)
+    try:
+        member_file = archive.open(member)
+    finally:
+        archive.close()  # the member keeps its own handle open
+    return member_file
+
+
+def _same_row(row, ticket):
+    return row is not None and row[0][19] == ticket.get("item_number") and row[0][20] == ticket.get("sequence_number")
+
+
+def _find_row(path, ticket):
+    if "::" in path:
+        return None
+    rows = lis_cache.lookup(path, ticket.get("press_a"), ticket.get("press_b")) or []
+    for row in rows:
+        if _same_row(row, ticket):
+            return row[1]
+    return None
+
+
+def read_batch_ids(text):
+    """Split pasted text or file contents into batch IDs (one per line, or separated by commas/spaces)."""
+    return [batch_id for batch_id in text.replace(",", " ").split() if batch_id]
@@ -0,0 +1,76 @@
+import os
+import time
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+
+class FileLock:
+    """Exclusive lock on a side file, shared by every process using the same save file.
+
+    Uses msvcrt.locking on Windows and fcntl.flock elsewhere. The lock is
+    reentrant within a process (callers serialize their own threads), so a
+    locked section can call other locked methods. Raises TimeoutError if
+    another process holds it for longer than `timeout` seconds.
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self.depth = 0
+        self.fd = None
+
+    def acquire(self):
+        if self.depth:
+            self.depth += 1
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self._lock(fd)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Another process has held {self.path} for over {self.timeout} s")
+                time.sleep(0.005)
+        self.fd = fd
+        self.depth = 1
+
+    def release(self):
+        if not self.depth:
+            return
+        self.depth -= 1
+        if self.depth:
+            return
+        try:
+            self._unlock(self.fd)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+    def _lock(self, fd):
+        if msvcrt:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(self, fd):
+        if msvcrt:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
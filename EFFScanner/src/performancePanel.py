@@ -0,0 +1,97 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from timing import timings
+
+
+class PerformancePanel:
+    """Help > Performance: p50/p95/max per scan stage from the timing ring buffer."""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, root, config):
+        self.root = root
+        self.config = config
+        self.window = None
+        self.tree = None
+        self.after_id = None
+
+    def show(self):
+        if self.window and self.window.winfo_exists():
+            self.window.lift()
+            return
+
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Performance")
+        self.window.geometry("560x360")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        header_frame = tk.Frame(self.window)
+        header_frame.pack(fill="x", padx=10, pady=5)
+
+        record_btn = tk.Button(header_frame)
+        record_btn.config(command=lambda: self.toggle_recording(record_btn))
+        self._update_record_btn(record_btn)
+        record_btn.pack(side="left", padx=5)
+        tk.Button(header_frame, text="Clear", command=self.clear).pack(side="left", padx=5)
+        tk.Button(header_frame, text="Export JSON...", command=self.export_json).pack(side="right", padx=5)
+        tk.Button(header_frame, text="Export CSV...", command=self.export_csv).pack(side="right", padx=5)
+
+        columns = ("stage", "count", "p50", "p95", "max")
+        self.tree = ttk.Treeview(self.window, columns=columns, show="headings", height=12)
+        for column, text, width in (("stage", "Stage", 160), ("count", "Count", 70), ("p50", "p50 (ms)", 90),
+                                    ("p95", "p95 (ms)", 90), ("max", "Max (ms)", 90)):
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w" if column == "stage" else "e")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        self.refresh()
+
+    def refresh(self):
+        if not (self.window and self.window.winfo_exists()):
+            return
+        stats = timings.stats()
+        for iid in self.tree.get_children():
+            if iid not in stats:
+                self.tree.delete(iid)
+        for stage in sorted(stats):
+            values = stats[stage]
+            row = (stage, values["count"], f"{values['p50'] * 1000:.2f}",
+                   f"{values['p95'] * 1000:.2f}", f"{values['max'] * 1000:.2f}")
+            if self.tree.exists(stage):
+                self.tree.item(stage, values=row)
+            else:
+                self.tree.insert("", "end", iid=stage, values=row)
+        self.after_id = self.root.after(self.REFRESH_MS, self.refresh)
+
+    def toggle_recording(self, record_btn):
+        timings.enabled = not timings.enabled
+        self.config.timing_enabled = timings.enabled
+        self.config.save_config()
+        self._update_record_btn(record_btn)
+
+    def _update_record_btn(self, record_btn):
+        record_btn.config(text=f"Recording: {'ON' if timings.enabled else 'OFF'}")
+
+    def clear(self):
+        timings.clear()
+        for iid in self.tree.get_children():
+            self.tree.delete(iid)
+
+    def export_csv(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", title="Export Timings", parent=self.window)
+        if path:
+            timings.export_csv(path)
+            messagebox.showinfo("Exported", f"Timings exported to:\n{path}", parent=self.window)
+
+    def export_json(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", title="Export Timings", parent=self.window)
+        if path:
+            timings.export_json(path)
+            messagebox.showinfo("Exported", f"Timings exported to:\n{path}", parent=self.window)
+
+    def close(self):
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.window.destroy()
+        self.window = None
@@ -0,0 +1,86 @@
+INTERVALS = (15, 60)  # bucket widths in minutes
+TOTAL = "All"  # pseudo-category holding every door in the bucket, categorized or not
+
+
+def minute_of_day(scan_time):
+    """Minutes since midnight from a scan time like ' 08:05:16' or '2025-07-07 08:05:16'."""
+    try:
+        hours, minutes = str(scan_time).strip()[-8:].split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return None
+
+
+class ThroughputRollups:
+    """Door counts per time-of-day bucket and category, kept up to date per ticket.
+
+    For each interval in INTERVALS, `buckets[interval]` maps the bucket's
+    start minute to {category: doors}. Adding or removing a ticket touches
+    one entry per interval, so the rollups never need a full recompute
+    except when the history is reloaded. While `built` is False (the
+    history hasn't been paged in yet) updates are skipped until rebuild().
+    """
+
+    def __init__(self, intervals=INTERVALS):
+        self.intervals = intervals
+        self.version = 0  # bumped on every change so views can skip redundant redraws
+        self.built = True
+        self.clear()
+
+    def clear(self):
+        self.buckets = {interval: {} for interval in self.intervals}
+        self.version += 1
+
+    def rebuild(self, tickets, keys):
+        self.clear()
+        self.built = True
+        for ticket, key in zip(tickets, keys):
+            self.add(ticket, key)
+
+    def invalidate(self):
+        self.clear()
+        self.built = False
+
+    def add(self, ticket, key):
+        self._update(ticket, key, 1)
+
+    def remove(self, ticket, key):
+        self._update(ticket, key, -1)
+
+    def _update(self, ticket, key, sign):
+        if not self.built:
+            return
+        minute = minute_of_day(ticket.get("scan_time"))
+        if minute is None:
+            return
+        try:
+            doors = sign * int(ticket.get("quantity", 1))
+        except (TypeError, ValueError):
+            doors = sign
+        for interval in self.intervals:
+            buckets = self.buckets[interval]
+            start = minute - minute % interval
+            counts = buckets.get(start)
+            if counts is None:
+                counts = buckets[start] = {}
+            for category in ((TOTAL, key) if key else (TOTAL,)):
+                value = counts.get(category, 0) + doors
+                if value > 0:
+                    counts[category] = value
+                else:
+                    counts.pop(category, None)
+            if not counts:
+                del buckets[start]
+        self.version += 1
+
+    def rows(self, interval, first_minute=0):
+        """(bucket label, {category: doors}) in time order, starting from first_minute (shift start)."""
+        buckets = self.buckets[interval]
+        first_minute -= first_minute % interval
+        order = sorted(buckets, key=lambda start: (start - first_minute) % 1440)
+        return [(self.label(start, interval), dict(buckets[start])) for start in order]
+
+    @staticmethod
+    def label(start, interval):
+        end = (start + interval) % 1440
+        return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
@@ -0,0 +1,296 @@
+"""Local scan service: many stations, one DataManager.
+
+    python scanService.py [--host 127.0.0.1] [--port 8765] [--folder DIR]
+
+Stations connect over TCP and exchange newline-delimited JSON messages:
+
+    -> {"id": 1, "op": "scan", "batch_ids": ["0707250155004"]}
+    <- {"type": "result", "id": 1, "reports": [{"batch_id": ..., "status": ..., "updated": [...], "tickets": [...]}]}
+    -> {"id": 2, "op": "totals"}
+    <- {"type": "totals", "id": 2, "totals": {...}, "total_count": 85}
+
+After every commit each connected station is also sent an unsolicited
+{"type": "totals", ...} message with the new totals.
+"""
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from config_manager import ConfigManager
+from dataManager import DataManager
+from ticket import ticket_to_json
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(",", ":"), default=ticket_to_json) + "\n").encode("utf-8")
+
+
+class _Station:
+    """One connected client. Sends may come from the writer or the client's own thread."""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        try:
+            with self.lock:
+                self.sock.sendall(_encode(message))
+            return True
+        except OSError:
+            return False
+
+
+class ScanService:
+    """TCP front end that funnels every station's scans through one writer thread.
+
+    Station threads only parse requests and queue them. The writer takes
+    whatever scans are queued at that moment, runs them as one
+    DataManager.scan_batches call (one storage commit), sends each station
+    its reports and pushes the new totals to everyone. When stations are
+    idle a scan is committed at once; under load the commits grow instead
+    of queueing up behind each other.
+    """
+
+    def __init__(self, data_manager, folder_path, host="127.0.0.1", port=8765, max_batch=500):
+        self.data_manager = data_manager
+        self.folder_path = folder_path
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.stations = set()
+        self.stations_lock = threading.Lock()
+        self.commits = 0
+        self.committed_ids = 0
+
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                service._serve_station(self.request, self.client_address, self.rfile)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self._server_thread = None
+        self._writer_thread = None
+
+    def start(self):
+        self._writer_thread = threading.Thread(target=self._run_writer, name="ScanServiceWriter", daemon=True)
+        self._writer_thread.start()
+        self._server_thread = threading.Thread(target=self.server.serve_forever, name="ScanService", daemon=True)
+        self._server_thread.start()
+        print(f"Scan service listening on {self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        """Stop accepting scans, let the writer finish what is queued, then close."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.requests.put(None)
+        if self._writer_thread:
+            self._writer_thread.join()
+        with self.stations_lock:
+            for station in self.stations:
+                try:
+                    station.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    # ---- Stations ---- #
+
+    def _serve_station(self, sock, address, rfile):
+        # Results and totals pushes are small writes back to back; don't let Nagle hold them
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        station = _Station(sock, address)
+        with self.stations_lock:
+            self.stations.add(station)
+        try:
+            for line in rfile:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    request_id = message.get("id")
+                    op = message.get("op")
+                except (ValueError, AttributeError):
+                    station.send({"type": "error", "error": "invalid JSON message"})
+                    continue
+
+                if op == "scan":
+                    batch_ids = [str(batch_id) for batch_id in message.get("batch_ids", [])]
+                    self.requests.put((station, request_id, batch_ids))
+                elif op == "totals":
+                    station.send(self._totals_message(request_id))
+                else:
+                    station.send({"type": "error", "id": request_id, "error": f"unknown op: {op}"})
+        except OSError:
+            pass
+        finally:
+            with self.stations_lock:
+                self.stations.discard(station)
+
+    def _totals_message(self, request_id=None):
+        message = {"type": "totals", "totals": self.data_manager.get_all(), "total_count": self.data_manager.get_total()}
+        if request_id is not None:
+            message["id"] = request_id
+        return message
+
+    # ---- Writer ---- #
+
+    def _run_writer(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            batch = [item]
+            count = len(item[2])
+            stopping = False
+            # Group every scan already waiting into this commit
+            while count < self.max_batch:
+                try:
+                    item = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                count += len(item[2])
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch):
+        batch_ids = [batch_id for _, _, ids in batch for batch_id in ids]
+        try:
+            reports = self.data_manager.scan_batches(self.folder_path, batch_ids)
+        except Exception as e:
+            print(f"Scan service commit failed: {e}")
+            for station, request_id, _ in batch:
+                station.send({"type": "error", "id": request_id, "error": str(e)})
+            return
+
+        self.commits += 1
+        self.committed_ids += len(batch_ids)
+        start = 0
+        for station, request_id, ids in batch:
+            station.send({"type": "result", "id": request_id, "reports": reports[start:start + len(ids)]})
+            start += len(ids)
+
+        totals = self._totals_message()
+        with self.stations_lock:
+            stations = list(self.stations)
+        for station in stations:
+            station.send(totals)
+
+
+class ScanClient:
+    """A station's connection to a ScanService.
+
+    scan() blocks until the service has committed the scan. Totals pushed
+    after every commit are kept in `totals` / `total_count` and passed to
+    `on_totals(totals, total_count)` (called on the client's reader thread).
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, on_totals=None, timeout=30.0):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile("rb")
+        self.on_totals = on_totals
+        self.timeout = timeout
+        self.totals = {}
+        self.total_count = 0
+        self.pending = {}  # request id -> [threading.Event, reply]
+        self.lock = threading.Lock()
+        self._ids = 0
+        self._reader = threading.Thread(target=self._read, name="ScanClient", daemon=True)
+        self._reader.start()
+
+    def scan(self, batch_ids):
+        """Scan batch IDs through the service. Returns their reports (tickets as dicts)."""
+        reply = self._request({"op": "scan", "batch_ids": list(batch_ids)})
+        return reply["reports"]
+
+    def get_totals(self):
+        reply = self._request({"op": "totals"})
+        return reply["totals"], reply["total_count"]
+
+    def _request(self, message):
+        with self.lock:
+            self._ids += 1
+            request_id = self._ids
+            waiter = [threading.Event(), None]
+            self.pending[request_id] = waiter
+            message["id"] = request_id
+            self.sock.sendall(_encode(message))
+        if not waiter[0].wait(self.timeout):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            raise TimeoutError(f"No reply from the scan service after {self.timeout} s")
+        reply = waiter[1]
+        if reply is None or reply.get("type") == "error":
+            raise RuntimeError(reply.get("error") if reply else "Scan service connection closed")
+        return reply
+
+    def _read(self):
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                if message.get("type") == "totals":
+                    self.totals = message["totals"]
+                    self.total_count = message["total_count"]
+                    if self.on_totals and "id" not in message:
+                        self.on_totals(self.totals, self.total_count)
+                request_id = message.get("id")
+                if request_id is None:
+                    continue
+                with self.lock:
+                    waiter = self.pending.pop(request_id, None)
+                if waiter:
+                    waiter[1] = message
+                    waiter[0].set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            # Wake anyone still waiting; their reply stays None
+            with self.lock:
+                waiters, self.pending = list(self.pending.values()), {}
+            for waiter in waiters:
+                waiter[0].set()
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def main():
+    config = ConfigManager()
+    parser = argparse.ArgumentParser(description="Serve scans from many stations through one DataManager")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=config.service_port)
+    parser.add_argument("--folder", default=config.data_folder, help="folder with the .LIS files")
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    service = ScanService(data_manager, args.folder, args.host, args.port)
+    service.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        data_manager.close()
+        print(f"Stopped after {service.commits} commits ({service.committed_ids} batch IDs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import queue
+import threading
+
+
+class ScanWorker:
+    """Runs scans on a background thread so the Tk window never freezes.
+
+    Scans are queued and handled one at a time by a single worker thread, so
+    they are applied in the order they were submitted. Results are passed
+    back to the Tk main thread by polling a result queue with `root.after`,
+    and each scan's callback runs there with its list of scan reports.
+    """
+
+    def __init__(self, root, data_manager, poll_ms=50):
+        self.root = root
+        self.data_manager = data_manager
+        self.poll_ms = poll_ms
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.running = True
+
+        self._thread = threading.Thread(target=self._run, name="ScanWorker", daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, folder_path, batch_ids, callback):
+        """Queue a scan. `callback(reports, error)` runs on the Tk thread when it finishes."""
+        self.requests.put((folder_path, batch_ids, callback))
+
+    def pending(self):
+        return self.requests.qsize()
+
+    def stop(self):
+        """Finish the scans already queued, then stop the worker thread."""
+        self.running = False
+        self.requests.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            folder_path, batch_ids, callback = item
+            try:
+                reports = self.data_manager.scan_batches(folder_path, batch_ids)
+                self.results.put((callback, reports, None))
+            except Exception as e:
+                self.results.put((callback, [], e))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, reports, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(reports, error)
+            except Exception as e:
+                print(f"Scan callback error: {e}")
+
+        if self.running:
+            self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,171 @@
+import shlex
+
+
+class TicketSearchIndex:
+    """Inverted trigram index over the searchable ticket fields.
+
+    For each field, every distinct value is indexed by its 3-character grams
+    and keeps the set of ticket uids that have it. A query intersects the
+    gram postings to get candidate values and only checks those with a
+    substring test. Repeated values like customer or door species are
+    therefore indexed once, however many tickets share them. Queries shorter
+    than three characters scan one joined string per ticket instead.
+
+    Queries keep the old behaviour: a plain query is one substring matched
+    against every field. Terms written as `field:text` (e.g. `customer:mccoy`)
+    only match that field, and all terms in such a query must match.
+    """
+
+    FIELDS = ("batch_id", "sequence_number", "order_number", "item_number", "door_species", "quantity", "customer", "scan_time")
+
+    ALIASES = {
+        "batch": "batch_id",
+        "seq": "sequence_number",
+        "sequence": "sequence_number",
+        "order": "order_number",
+        "item": "item_number",
+        "species": "door_species",
+        "door": "door_species",
+        "qty": "quantity",
+        "time": "scan_time",
+    }
+
+    SEP = "\x1f"  # joins a ticket's field values; can't be typed into a query
+
+    def __init__(self):
+        self.built = False
+        self.clear()
+
+    def clear(self):
+        self.docs = {}  # uid -> lowercased field values joined by SEP, in FIELDS order
+        self.values = {field: {} for field in self.FIELDS}  # field -> value -> set of uids
+        self.grams = {field: {} for field in self.FIELDS}  # field -> gram -> set of values
+
+    # ---- Maintenance ---- #
+
+    def build(self, tickets):
+        self.clear()
+        for ticket in tickets:
+            self.add(ticket)
+        self.built = True
+
+    def on_change(self, event, tickets):
+        """DataManager listener: keep the index in step with the ticket history."""
+        if event == "reload":
+            # Rebuilt lazily by the next search
+            self.built = False
+            self.clear()
+            return
+        if not self.built:
+            return
+        for ticket in tickets:
+            if event in ("delete", "update"):
+                self.remove(ticket.uid)
+            if event in ("add", "update"):
+                self.add(ticket)
+
+    def add(self, ticket):
+        doc = [str(ticket.get(field, "")).lower() for field in self.FIELDS]
+        self.docs[ticket.uid] = self.SEP.join(doc)
+        for field, value in zip(self.FIELDS, doc):
+            uids = self.values[field].get(value)
+            if uids is None:
+                uids = self.values[field][value] = set()
+                grams = self.grams[field]
+                for gram in self._grams(value):
+                    entries = grams.get(gram)
+                    if entries is None:
+                        entries = grams[gram] = set()
+                    entries.add(value)
+            uids.add(ticket.uid)
+
+    def remove(self, uid):
+        doc = self.docs.pop(uid, None)
+        if doc is None:
+            return
+        for field, value in zip(self.FIELDS, doc.split(self.SEP)):
+            uids = self.values[field].get(value)
+            if uids is None:
+                continue
+            uids.discard(uid)
+            if not uids:
+                del self.values[field][value]
+                grams = self.grams[field]
+                for gram in self._grams(value):
+                    entries = grams.get(gram)
+                    if entries is not None:
+                        entries.discard(value)
+                        if not entries:
+                            del grams[gram]
+
+    def _grams(self, value):
+        return {value[i:i + 3] for i in range(len(value) - 2)}
+
+    # ---- Queries ---- #
+
+    def parse_query(self, query):
+        """Split a query into (field or None, text) terms."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        if ":" not in query:
+            return [(None, query)]
+
+        try:
+            tokens = shlex.split(query)
+        except ValueError:
+            tokens = query.split()
+
+        terms = []
+        for token in tokens:
+            name, sep, text = token.partition(":")
+            field = self.ALIASES.get(name, name)
+            if sep and field in self.FIELDS:
+                if text:
+                    terms.append((field, text))
+            else:
+                terms.append((None, token))
+        return terms
+
+    def search(self, query):
+        """Return the set of matching ticket uids, or None if the query matches everything."""
+        terms = self.parse_query(query)
+        if not terms:
+            return None
+
+        result = None
+        for field, text in terms:
+            uids = self._search_term(field, text)
+            result = uids if result is None else result & uids
+            if not result:
+                return set()
+        return result
+
+    def matches(self, ticket, query):
+        """Check one ticket against a query without the index (used for newly added rows)."""
+        for field, text in self.parse_query(query):
+            fields = (field,) if field else self.FIELDS
+            if not any(text in str(ticket.get(f, "")).lower() for f in fields):
+                return False
+        return True
+
+    def _search_term(self, field, text):
+        if len(text) < 3 and field is None:
+            return {uid for uid, doc in self.docs.items() if text in doc}
+
+        uids = set()
+        for f in ((field,) if field else self.FIELDS):
+            if len(text) < 3:
+                candidates = self.values[f]
+            else:
+                postings = [self.grams[f].get(gram) for gram in self._grams(text)]
+                if not all(postings):
+                    continue
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for entries in postings[1:]:
+                    candidates &= entries
+            for value in candidates:
+                if text in value:
+                    uids |= self.values[f][value]
+        return uids
@@ -0,0 +1,136 @@
+import json
+import os
+import time as timer
+from datetime import date, datetime, time
+from categorizer import categorizer, totals_drift
+from storage import write_atomic
+from ticket import Ticket, ticket_to_json
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ShiftArchive:
+    """Date-partitioned archive of closed shifts.
+
+    Each closed shift is written to its own JSON file in `archive_dir`. A
+    small manifest (index.json) records every file's shift start/end, so a
+    date-range query opens only the partitions that overlap the range.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.manifest_path = os.path.join(archive_dir, "index.json")
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def seal(self, data, shift_end=None):
+        """Write one shift's data as a new partition. Returns the partition path."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        shift_end = shift_end or datetime.now()
+        shift_start = data.get("shift_start") or shift_end.strftime(TIME_FORMAT)
+
+        stamp = shift_end.strftime('%Y%m%d_%H%M%S')
+        file_name = f"shift_{stamp}.json"
+        suffix = 1
+        while os.path.exists(os.path.join(self.archive_dir, file_name)):
+            suffix += 1
+            file_name = f"shift_{stamp}_{suffix}.json"
+        path = os.path.join(self.archive_dir, file_name)
+        partition = {
+            "shift_start": shift_start,
+            "shift_end": shift_end.strftime(TIME_FORMAT),
+            "category_totals": data["category_totals"],
+            "total_count": data["total_count"],
+            "scanned_tickets": data["scanned_tickets"]
+        }
+        # Both files are replaced whole and synced: the caller clears the live data right after
+        write_atomic(path, lambda f: json.dump(partition, f, separators=(",", ":"), default=ticket_to_json))
+
+        manifest = self.manifest()
+        manifest.append({
+            "file": file_name,
+            "shift_start": partition["shift_start"],
+            "shift_end": partition["shift_end"],
+            "total_count": partition["total_count"],
+            "tickets": len(partition["scanned_tickets"])
+        })
+        self._write_manifest(manifest)
+        return path
+
+    def _write_manifest(self, manifest):
+        write_atomic(self.manifest_path, lambda f: json.dump(manifest, f, indent=4))
+
+    def partitions(self, start=None, end=None):
+        """Manifest entries for the shifts overlapping [start, end] (dates, datetimes or strings)."""
+        start = _as_datetime(start, time.min) if start else None
+        end = _as_datetime(end, time.max) if end else None
+        entries = []
+        for entry in self.manifest():
+            shift_start = datetime.strptime(entry["shift_start"], TIME_FORMAT)
+            shift_end = datetime.strptime(entry["shift_end"], TIME_FORMAT)
+            if (end is None or shift_start <= end) and (start is None or shift_end >= start):
+                entries.append(entry)
+        return entries
+
+    def load_range(self, start=None, end=None):
+        """Load the shifts overlapping [start, end]; tickets come back as Ticket records."""
+        shifts = []
+        for entry in self.partitions(start, end):
+            with open(os.path.join(self.archive_dir, entry["file"]), "r") as f:
+                shift = json.load(f)
+            shift["scanned_tickets"] = [Ticket.from_dict(t) for t in shift["scanned_tickets"]]
+            shifts.append(shift)
+        return shifts
+
+    def rebuild_totals(self, start=None, end=None, repair=False):
+        """Recompute each archived shift's totals from its tickets.
+
+        Returns {file name: drift} for the shifts whose stored totals had
+        drifted (see totals_drift); with repair, those partitions and their
+        manifest entries are rewritten with the rebuilt totals.
+        """
+        started = timer.perf_counter()
+        results = {}
+        manifest = self.manifest()
+        checked = tickets = 0
+        for entry in self.partitions(start, end):
+            path = os.path.join(self.archive_dir, entry["file"])
+            with open(path, "r") as f:
+                shift = json.load(f)
+            checked += 1
+            tickets += len(shift["scanned_tickets"])
+            totals, total_count = categorizer.totals(shift["scanned_tickets"])
+            drift = totals_drift(shift["category_totals"], shift["total_count"], totals, total_count)
+            if not drift:
+                continue
+            results[entry["file"]] = drift
+            if repair:
+                for key in shift["category_totals"]:
+                    shift["category_totals"][key] = totals.get(key, 0)
+                shift["total_count"] = total_count
+                write_atomic(path, lambda f: json.dump(shift, f, separators=(",", ":")))
+                for stored in manifest:
+                    if stored["file"] == entry["file"]:
+                        stored["total_count"] = total_count
+
+        if repair and results:
+            self._write_manifest(manifest)
+        elapsed = (timer.perf_counter() - started) * 1000
+        print(f"Rebuilt totals for {checked} shifts ({tickets} tickets) in {elapsed:.0f} ms, {len(results)} drifted")
+        return results
+
+
+def _as_datetime(value, default_time):
+    """Accept a datetime, a date (start or end of that day) or an ISO string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, default_time)
+    value = str(value)
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), default_time)
+    return datetime.fromisoformat(value)
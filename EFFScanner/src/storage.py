@@ -0,0 +1,609 @@
+import contextlib
+import json
+import os
+import sqlite3
+from fileLock import FileLock
+from ticket import dedupe_key, pack_tickets, ticket_to_json, unpack_tickets
+
+
+def _stat(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist: enough to tell it was rewritten."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# fsync_policy: "always" syncs every write, "snapshot" only whole-file rewrites, "never" leaves it to the OS
+FSYNC_POLICIES = ("always", "snapshot", "never")
+
+
+def write_atomic(path, write, fsync=True, mode="w"):
+    """Write a file through a temp file next to it, then os.replace it over `path`.
+
+    `write(f)` fills the temp file. A crash mid-write leaves the old file
+    intact instead of a truncated one.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            write(f)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+PAGE_SIZE = 1000  # tickets per page of a paged save file
+
+
+class StoredTickets:
+    """Ticket history whose bodies are still in storage.
+
+    load() reads only the totals and one dedupe key per stored ticket and
+    puts this in data["scanned_tickets"]. read() pages the stored tickets
+    in (DataManager does this the first time it needs them) and returns
+    None if the save file was replaced since, meaning load again. Tickets
+    added in the meantime are kept in `tail`, and delete/reprocess records
+    replayed in the meantime in `deferred` (applied when paged in; until
+    then the stored pages can't be copied as they are). `pages` is where
+    the storage finds the stored tickets: byte ranges of a paged file, or
+    the last SQLite row id.
+    """
+
+    def __init__(self, storage, keys, pages, stat=None):
+        self.storage = storage
+        self.keys = keys
+        self.pages = pages
+        self.stat = stat
+        self.tail = []
+        self.deferred = []
+
+    def __len__(self):
+        return len(self.keys) + len(self.tail)
+
+    def append(self, ticket):
+        self.tail.append(ticket)
+
+    def read(self):
+        return self.storage.read_stored(self)
+
+    def stale(self):
+        return self.storage.stored_stale(self)
+
+
+def _unpack(data):
+    if isinstance(data.get("scanned_tickets"), dict):
+        data["scanned_tickets"] = unpack_tickets(data["scanned_tickets"])
+    return data
+
+
+class JsonStorage:
+    """Keeps the whole EFF data set in one JSON file, rewritten on every change.
+
+    Several app instances may share the file. Writers hold `file_lock` and
+    call sync() first; the JSON file has no change log, so if another
+    instance rewrote it the only way to catch up is a full load(). Pass
+    shared=False for one-off files such as exports.
+
+    The file is saved paged: a header line (totals, total_count, the page
+    table), a line of dedupe keys, then one line per PAGE_SIZE tickets
+    dictionary-encoded by pack_tickets. Loading reads the first two lines
+    only (see StoredTickets), so start-up doesn't grow with the history,
+    and pages nobody has touched are copied byte for byte on the next
+    save. packed=False writes the classic single JSON document instead;
+    both load.
+    """
+
+    def __init__(self, path, fsync_policy="always", shared=True, packed=True):
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.packed = packed
+        self.file_lock = FileLock(path + ".lock") if shared else contextlib.nullcontext()
+        self.file_stat = None
+
+    def locked(self):
+        """Context manager holding the cross-process lock on the save file."""
+        return self.file_lock
+
+    def load(self):
+        """Return (data, records): the saved data (or None) and any mutations to replay."""
+        with self.file_lock:
+            self.file_stat = _stat(self.path)
+            if self.file_stat is None:
+                return None, []
+            with open(self.path, "rb") as f:
+                first = f.readline()
+                try:
+                    header = json.loads(first)
+                except ValueError:
+                    header = None  # an indented classic file
+                if not (isinstance(header, dict) and header.get("format") == "paged"):
+                    return _unpack(json.loads(first + f.read())), []
+
+                keys = [tuple(key) for key in json.loads(f.readline())["dedupe_keys"]]
+                base = f.tell()
+            pages = [(base + offset, length, count) for offset, length, count in header.pop("pages")]
+            header.pop("format")
+            header.pop("ticket_count", None)
+            header["scanned_tickets"] = StoredTickets(self, keys, pages, self.file_stat)
+            return header, []
+
+    def read_stored(self, stored):
+        if self.stored_stale(stored):
+            return None
+        tickets = []
+        with open(self.path, "rb") as f:
+            for offset, length, count in stored.pages:
+                f.seek(offset)
+                tickets.extend(unpack_tickets(json.loads(f.read(length))))
+        return tickets
+
+    def stored_stale(self, stored):
+        return _stat(self.path) != stored.stat
+
+    def sync(self):
+        """Records other instances committed since we last loaded or wrote, or None if a full load() is needed."""
+        return [] if _stat(self.path) == self.file_stat else None
+
+    def save(self, data):
+        with self.file_lock:
+            if self.packed:
+                self._write_paged(data)
+                return
+            write_atomic(self.path, lambda f: json.dump(data, f, indent=4, default=ticket_to_json),
+                         self.fsync_policy != "never")
+            self.file_stat = _stat(self.path)
+
+    def _write_paged(self, data, **header):
+        """Write `data` in the paged layout, copying the stored pages of a StoredTickets history as they are."""
+        tickets = data["scanned_tickets"]
+        stored = tickets if isinstance(tickets, StoredTickets) and tickets.storage is self else None
+        pages = []
+        keys = []
+        if stored is not None:
+            if self.stored_stale(stored):
+                raise RuntimeError(f"{self.path} was replaced since it was loaded; sync before saving")
+            if stored.deferred:
+                raise RuntimeError("Deferred changes to the stored tickets; page them in before saving")
+            with open(self.path, "rb") as f:
+                for offset, length, count in stored.pages:
+                    f.seek(offset)
+                    pages.append((f.read(length), count))
+            keys.extend(stored.keys)
+            tickets = stored.tail
+        copied = len(pages)
+        for start in range(0, len(tickets), PAGE_SIZE):
+            page = tickets[start:start + PAGE_SIZE]
+            raw = json.dumps(pack_tickets(page), separators=(",", ":"), default=ticket_to_json)
+            pages.append((raw.encode("utf-8") + b"\n", len(page)))
+            keys.extend(dedupe_key(t) for t in page)
+
+        table = []
+        offset = 0
+        for raw, count in pages:
+            table.append([offset, len(raw), count])
+            offset += len(raw)
+        header.update({key: value for key, value in data.items() if key != "scanned_tickets"})
+        header.update(format="paged", ticket_count=len(keys), pages=table)
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n"
+        key_line = json.dumps({"dedupe_keys": keys}, separators=(",", ":")).encode("utf-8") + b"\n"
+
+        def write(f):
+            f.write(head)
+            f.write(key_line)
+            f.writelines(raw for raw, _ in pages)
+
+        write_atomic(self.path, write, self.fsync_policy != "never", mode="wb")
+        self.file_stat = _stat(self.path)
+        if stored is not None:
+            base = len(head) + len(key_line)
+            stored.pages = [(base + offset, length, count) for offset, length, count in table[:copied]]
+            stored.stat = self.file_stat
+
+    def append(self, data, record):
+        self.append_many(data, [record])
+
+    def append_many(self, data, records):
+        self.save(data)
+
+    def close(self, data):
+        pass
+
+
+class JournalStorage(JsonStorage):
+    """Snapshot file plus an append-only journal of mutations.
+
+    Each mutation is appended as one compact JSON line, so a scan costs the
+    same at the end of a shift as at the start. The journal is folded into a
+    new snapshot every `compact_every` records and on close. Records carry a
+    sequence number and the snapshot stores the last one it contains, so a
+    crash between writing the snapshot and truncating the journal never
+    replays a record twice.
+
+    The sequence numbers are shared by every instance writing to the same
+    file, which makes them a version: sync() reads only the journal bytes
+    past `offset` and returns the records numbered after `seq`. A compacted
+    journal starts with a {"op": "base", "seq": N, "from": F} line followed
+    by the last few records already in the snapshot (F+1 to N), so an
+    instance that had seen record F carries on incrementally. A gap (it fell
+    further behind, or another instance saved a reset or import) means a
+    full load().
+    """
+
+    KEEP_TAIL = 100  # records kept past a compaction for instances that are behind
+
+    def __init__(self, path, compact_every=500, fsync_policy="always"):
+        super().__init__(path, fsync_policy)
+        self.journal_path = os.path.splitext(path)[0] + ".journal"
+        self.compact_every = compact_every
+        self.seq = 0
+        self.pending = 0
+        self.offset = 0  # bytes of the journal already read or written
+        self.journal_stat = None
+
+    def load(self):
+        with self.file_lock:
+            data, _ = super().load()
+            self.seq = data.pop("journal_seq", 0) if data else 0
+            snapshot_seq = self.seq
+
+            records = []
+            lines, self.offset = self._read_journal(0)
+            for record in lines:
+                if record.get("op") != "base" and record.get("seq", 0) > snapshot_seq:
+                    records.append(record)
+                    self.seq = record["seq"]
+            self.journal_stat = _stat(self.journal_path)
+
+        self.pending = len(records)
+        return data, records
+
+    def sync(self):
+        stat = _stat(self.journal_path)
+        if stat == self.journal_stat:
+            return []
+        if stat is not None and stat[1] >= self.offset:
+            records = self._records_after(self.offset)
+            if records is not None or not self.offset:
+                return records
+        # The journal was compacted under our offset: see if it still continues from our seq
+        return self._records_after(0)
+
+    def _records_after(self, start):
+        lines, end = self._read_journal(start)
+        if start and not lines and end < (_stat(self.journal_path) or (0, 0))[1]:
+            return None  # our offset is no longer on a record boundary
+        seq = self.seq
+        records = []
+        for record in lines:
+            if record.get("op") == "base":
+                if record.get("from", record["seq"]) > seq:
+                    return None
+            elif record.get("seq", 0) > seq:
+                if record["seq"] != seq + 1:
+                    return None
+                records.append(record)
+                seq = record["seq"]
+
+        self.seq = seq
+        self.offset = end
+        self.journal_stat = _stat(self.journal_path)
+        self.pending = self.pending + len(records) if start else len(records)
+        return records
+
+    def _read_journal(self, start):
+        """(records, end offset) for the whole JSON lines from byte `start` on."""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(start)
+                chunk = f.read()
+        except OSError:
+            return [], 0
+
+        records = []
+        end = start
+        for line in chunk.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn write from a crash
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # torn write from a crash, nothing valid follows
+            end += len(line)
+        return records, end
+
+    def save(self, data):
+        """Write a new snapshot of `data`, which replaces rather than extends the journal.
+
+        Bumping the sequence number makes every other instance reload it.
+        """
+        self.seq += 1
+        self._compact(data, keep_tail=False)
+
+    def _compact(self, data, keep_tail=True):
+        with self.file_lock:
+            tail = []
+            if keep_tail:
+                records, _ = self._read_journal(0)
+                tail = [r for r in records if r.get("op") != "base"][-self.KEEP_TAIL:]
+            fsync = self.fsync_policy != "never"
+            self._write_paged(data, journal_seq=self.seq)
+            base = {"op": "base", "seq": self.seq, "from": tail[0]["seq"] - 1 if tail else self.seq}
+            lines = [json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n" for record in [base] + tail]
+            write_atomic(self.journal_path, lambda f: f.writelines(lines), fsync, mode="wb")
+            self.offset = sum(len(line) for line in lines)
+            self.journal_stat = _stat(self.journal_path)
+        self.pending = 0
+
+    def append_many(self, data, records):
+        """Append records after sync(); the caller holds the lock across both."""
+        lines = []
+        for record in records:
+            self.seq += 1
+            record = dict(record, seq=self.seq)
+            lines.append(json.dumps(record, separators=(",", ":"), default=ticket_to_json).encode("utf-8") + b"\n")
+        with self.file_lock:
+            with open(self.journal_path, "ab") as f:
+                # Drop anything past the last whole record (a torn write) before appending
+                f.truncate(self.offset)
+                f.writelines(lines)
+                self.offset = f.tell()
+                if self.fsync_policy == "always":
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.journal_stat = _stat(self.journal_path)
+
+        self.pending += len(records)
+        # Put off while replayed changes wait for the history to be paged in; close() pages it in
+        if self.pending >= self.compact_every and not getattr(data["scanned_tickets"], "deferred", None):
+            self._compact(data)
+
+    def close(self, data):
+        if self.pending:
+            self._compact(data)
+
+
+class SqliteStorage:
+    """Keeps tickets and totals in a local SQLite file, one transaction per change.
+
+    Each ticket is stored as its JSON body plus the columns used to find it
+    again. If the database is empty on first load, the JSON save file is
+    imported so switching backends keeps the current shift.
+
+    Every change is also written to the `journal` table under a sequence
+    number shared by all instances using the database, so sync() can pick
+    up another instance's changes with one indexed query. `journal_base` in
+    the meta table is the last sequence number no longer in the journal.
+    """
+
+    KEEP_RECORDS = 5000  # journal rows kept for instances that fall behind
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scanned_tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT,
+            item_number TEXT,
+            order_number TEXT,
+            sequence_number TEXT,
+            scan_time TEXT,
+            ticket TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tickets_dedupe
+            ON scanned_tickets (batch_id, item_number, order_number);
+        CREATE INDEX IF NOT EXISTS idx_tickets_sequence
+            ON scanned_tickets (batch_id, sequence_number);
+        CREATE TABLE IF NOT EXISTS category_totals (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS journal (
+            seq INTEGER PRIMARY KEY,
+            record TEXT NOT NULL
+        );
+    """
+
+    # fsync_policy -> PRAGMA synchronous
+    SYNCHRONOUS = {"always": "FULL", "snapshot": "NORMAL", "never": "OFF"}
+
+    def __init__(self, path, json_path=None, fsync_policy="always"):
+        self.path = path
+        self.json_path = json_path
+        # DataManager serializes access, so the scan worker thread may use it too
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(f"PRAGMA synchronous = {self.SYNCHRONOUS.get(fsync_policy, 'FULL')}")
+        self.conn.executescript(self.SCHEMA)
+        self.file_lock = FileLock(path + ".lock")
+        self.seq = 0
+        self.data_version = None
+
+    def locked(self):
+        """Context manager holding the cross-process lock on the database."""
+        return self.file_lock
+
+    def load(self):
+        with self.file_lock:
+            self.seq = max(self._journal_base(), self.conn.execute("SELECT MAX(seq) FROM journal").fetchone()[0] or 0)
+            self.data_version = self._data_version()
+            cur = self.conn.execute("SELECT value FROM meta WHERE key = 'total_count'")
+            row = cur.fetchone()
+            if row is None:
+                # Fresh database: bring over the existing JSON save file, if any
+                data, _ = JsonStorage(self.json_path).load() if self.json_path else (None, [])
+                if data is not None:
+                    if isinstance(data["scanned_tickets"], StoredTickets):
+                        data["scanned_tickets"] = data["scanned_tickets"].read()
+                    self.save(data)
+                return data, []
+
+            # Only the dedupe columns now; read_stored() fetches the bodies on demand
+            rows = self.conn.execute(
+                "SELECT id, batch_id, item_number, order_number FROM scanned_tickets ORDER BY id").fetchall()
+            data = {
+                "category_totals": dict(self.conn.execute("SELECT key, value FROM category_totals")),
+                "scanned_tickets": StoredTickets(self, [row[1:] for row in rows], rows[-1][0] if rows else 0,
+                                                 self.seq),
+                "total_count": int(row[0])
+            }
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'shift_start'").fetchone()
+            if row is not None:
+                data["shift_start"] = row[0]
+            return data, []
+
+    def read_stored(self, stored):
+        if self.stored_stale(stored):
+            return None
+        return [json.loads(ticket) for (ticket,) in
+                self.conn.execute("SELECT ticket FROM scanned_tickets WHERE id <= ? ORDER BY id", (stored.pages,))]
+
+    def stored_stale(self, stored):
+        # Rows only keep their ids until a wholesale save, which replaces the journal base
+        return self._journal_base() > stored.stat
+
+    def sync(self):
+        """Records other instances committed since we last loaded or wrote, or None if a full load() is needed."""
+        # data_version only moves when another connection commits
+        version = self._data_version()
+        if version == self.data_version:
+            return []
+        self.data_version = version
+        if self._journal_base() > self.seq:
+            return None
+        records = [json.loads(record) for (record,) in
+                   self.conn.execute("SELECT record FROM journal WHERE seq > ? ORDER BY seq", (self.seq,))]
+        if records:
+            self.seq = records[-1]["seq"]
+        return records
+
+    def save(self, data):
+        tickets = data["scanned_tickets"]
+        stored = tickets if isinstance(tickets, StoredTickets) and tickets.storage is self else None
+        with self.file_lock, self.conn:
+            if stored is not None:
+                tickets = stored.read()
+                if tickets is None:
+                    raise RuntimeError(f"{self.path} was rewritten since it was loaded; sync before saving")
+            self.conn.execute("DELETE FROM scanned_tickets")
+            insert = ("INSERT INTO scanned_tickets (batch_id, item_number, order_number, sequence_number, scan_time, ticket) "
+                      "VALUES (?, ?, ?, ?, ?, ?)")
+            self.conn.executemany(insert, [self._ticket_row(t) for t in tickets])
+            if stored is not None:
+                stored.pages = self.conn.execute("SELECT MAX(id) FROM scanned_tickets").fetchone()[0] or 0
+                self.conn.executemany(insert, [self._ticket_row(t) for t in stored.tail])
+            self.conn.execute("DELETE FROM category_totals")
+            self._write_totals(data)
+            # A wholesale save replaces the journal; other instances will reload
+            self.seq += 1
+            self.conn.execute("DELETE FROM journal")
+            self._set_meta("journal_base", self.seq)
+            if stored is not None:
+                stored.stat = self.seq
+
+    def append(self, data, record):
+        self.append_many(data, [record])
+
+    def append_many(self, data, records):
+        """Write records after sync(); the caller holds the lock across both."""
+        with self.file_lock, self.conn:
+            rows = []
+            for record in records:
+                self._write_record(record)
+                self.seq += 1
+                rows.append((self.seq, json.dumps(dict(record, seq=self.seq), separators=(",", ":"), default=ticket_to_json)))
+            self.conn.executemany("INSERT INTO journal (seq, record) VALUES (?, ?)", rows)
+            self._write_totals(data)
+            if self.seq % self.KEEP_RECORDS < len(records):
+                base = self.seq - self.KEEP_RECORDS
+                self.conn.execute("DELETE FROM journal WHERE seq <= ?", (base,))
+                self._set_meta("journal_base", max(base, self._journal_base()))
+
+    def _journal_base(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'journal_base'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def _write_record(self, record):
+        op = record["op"]
+        if op == "add":
+            self.conn.execute(
+                "INSERT INTO scanned_tickets (batch_id, item_number, order_number, sequence_number, scan_time, ticket) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._ticket_row(record["ticket"])
+            )
+        elif op == "delete":
+            t = record["ticket"]
+            self.conn.execute(
+                "DELETE FROM scanned_tickets WHERE batch_id IS ? AND item_number IS ? AND scan_time IS ?",
+                (t.get("batch_id"), t.get("item_number"), t.get("scan_time"))
+            )
+        elif op == "reprocess":
+            old = record["old"]
+            row = self._ticket_row(record["new"])
+            self.conn.execute(
+                "UPDATE scanned_tickets SET batch_id = ?, item_number = ?, order_number = ?, "
+                "sequence_number = ?, scan_time = ?, ticket = ? "
+                "WHERE id = (SELECT id FROM scanned_tickets WHERE batch_id IS ? AND sequence_number IS ? "
+                "ORDER BY id LIMIT 1)",
+                row + (old.get("batch_id"), old.get("sequence_number"))
+            )
+
+    def close(self, data):
+        self.conn.close()
+
+    def _ticket_row(self, ticket):
+        return (
+            ticket.get("batch_id"),
+            ticket.get("item_number"),
+            ticket.get("order_number"),
+            ticket.get("sequence_number"),
+            ticket.get("scan_time"),
+            json.dumps(ticket, separators=(",", ":"), default=ticket_to_json)
+        )
+
+    def _write_totals(self, data):
+        self.conn.executemany(
+            # Upsert in place so rows keep their insertion order (the display order)
+            "INSERT INTO category_totals (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            data["category_totals"].items()
+        )
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('total_count', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (str(data["total_count"]),)
+        )
+        if data.get("shift_start"):
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('shift_start', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (data["shift_start"],)
+            )
+
+
+def create_storage(config):
+    """Build the storage backend selected by `config.storage_mode` ("json", "journal" or "sqlite")."""
+    fsync_policy = config.fsync_policy if config.fsync_policy in FSYNC_POLICIES else "always"
+    if config.storage_mode == "journal":
+        return JournalStorage(config.json_save_path, config.journal_compact_every, fsync_policy)
+    if config.storage_mode == "sqlite":
+        sqlite_path = config.sqlite_path or os.path.splitext(config.json_save_path)[0] + ".db"
+        return SqliteStorage(sqlite_path, config.json_save_path, fsync_policy)
+    return JsonStorage(config.json_save_path, fsync_policy)
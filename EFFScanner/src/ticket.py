@@ -0,0 +1,193 @@
+import sys
+
+
+class Ticket:
+    """One scanned ticket row.
+
+    A slotted record with the same keys the scanner has always produced. It
+    keeps the dict-style access (`ticket["quantity"]`, `ticket.get(...)`)
+    the rest of the app uses, so it can stand in for the old row dicts.
+    Unknown keys from older save files are kept in `extra`. `uid` is a
+    per-session row id assigned by DataManager; it is never saved.
+
+    Scanned tickets don't copy their .LIS row: `line_ref` is the (file path,
+    byte offset) of the row and `ticket["original_line"]` reads it back on
+    demand. Tickets from older save files keep their stored original_line.
+    Values of SHARED_FIELDS repeat across thousands of tickets, so they are
+    interned to share one string each.
+    """
+
+    FIELDS = (
+        "batch_id", "press_a", "press_b", "quantity", "door_size", "door_species",
+        "frame_code", "customer", "order_number", "item_number", "sequence_number",
+        "scan_time", "original_line", "line_ref"
+    )
+    SHARED_FIELDS = ("door_size", "door_species", "frame_code", "customer", "order_number", "scan_time")
+    __slots__ = FIELDS + ("extra", "uid")
+
+    def __init__(self, **fields):
+        self.extra = None
+        self.uid = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, ticket_dict):
+        if isinstance(ticket_dict, cls):
+            return ticket_dict
+        return cls(**ticket_dict)
+
+    def to_dict(self):
+        result = {}
+        for key in self.FIELDS:
+            try:
+                result[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def copy(self):
+        return Ticket(**self.to_dict())
+
+    # ---- dict-style access ---- #
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                if key == "original_line":
+                    line = self.resolve_line()
+                    if line is not None:
+                        return line
+                raise KeyError(key) from None
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            if key in self.SHARED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            elif key == "line_ref" and value is not None:
+                value = (sys.intern(value[0]), value[1])  # a [path, offset] list when read from JSON
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def resolve_line(self, archive_folder=None):
+        """The .LIS row this ticket was scanned from, or None if it can't be found any more."""
+        # Imported here because effscanner builds Tickets
+        from effscanner import resolve_original_lines
+        return resolve_original_lines([self], archive_folder)[0]
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def __eq__(self, other):
+        if isinstance(other, Ticket):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Ticket({self.to_dict()!r})"
+
+
+def dedupe_key(ticket):
+    """Tickets with the same (batch_id, item_number, order_number) are the same scan."""
+    return (ticket.get("batch_id"), ticket.get("item_number"), ticket.get("order_number"))
+
+
+def ticket_to_json(obj):
+    """`default=` hook for json.dump so Ticket objects serialize as plain dicts."""
+    if isinstance(obj, Ticket):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def pack_tickets(tickets):
+    """Dictionary-encode tickets for a save file.
+
+    Each ticket becomes a list of its FIELDS values (None where unset, plus
+    its `extra` dict at the end if it has one). SHARED_FIELDS values and
+    line_ref paths are stored once in `values` and referenced by position.
+    """
+    fields = Ticket.FIELDS
+    shared = {field: {} for field in Ticket.SHARED_FIELDS + ("line_file",)}
+    rows = []
+    for ticket in tickets:
+        ticket = Ticket.from_dict(ticket)
+        row = []
+        for field in fields:
+            value = getattr(ticket, field, None)
+            if value is not None:
+                if field in shared:
+                    value = shared[field].setdefault(value, len(shared[field]))
+                elif field == "line_ref":
+                    files = shared["line_file"]
+                    value = [files.setdefault(value[0], len(files)), value[1]]
+            row.append(value)
+        if ticket.extra:
+            row.append(ticket.extra)
+        rows.append(row)
+    return {
+        "fields": list(fields),
+        "values": {field: list(values) for field, values in shared.items()},
+        "rows": rows
+    }
+
+
+def unpack_tickets(packed):
+    """Tickets from pack_tickets output."""
+    fields = packed["fields"]
+    values = packed["values"]
+    files = values.get("line_file", [])
+    lookups = [values.get(field) if field in Ticket.SHARED_FIELDS else None for field in fields]
+    tickets = []
+    for row in packed["rows"]:
+        ticket = Ticket()
+        for field, lookup, value in zip(fields, lookups, row):
+            if value is None:
+                continue
+            if lookup is not None:
+                value = lookup[value]
+            elif field == "line_ref":
+                value = (files[value[0]], value[1])
+            ticket[field] = value
+        if len(row) > len(fields):
+            ticket.extra = row[len(fields)]
+        tickets.append(ticket)
+    return tickets
+
+
+def tickets_to_dataframe(tickets):
+    """Build a pandas DataFrame from tickets (or plain row dicts). pandas is only needed for this export."""
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is required to export tickets as a DataFrame") from None
+    return pd.DataFrame([t.to_dict() if isinstance(t, Ticket) else t for t in tickets])
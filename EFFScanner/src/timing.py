@@ -0,0 +1,120 @@
+import csv
+import json
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class _Span:
+    __slots__ = ("timings", "stage", "start")
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Timings:
+    """Bounded ring buffer of timing spans for the scan hot path.
+
+    Wrap a stage in `with timings.span("stage"):` to record how long it took.
+    While `enabled` is False, span() hands back a shared no-op context and
+    record() returns at once, so instrumented code costs one attribute check.
+    """
+
+    def __init__(self, max_spans=5000):
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)  # (stage, seconds, wall-clock time)
+        self.lock = threading.Lock()
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.spans.append((stage, seconds, time.time()))
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.spans)
+
+    def stats(self):
+        """{stage: {"count", "p50", "p95", "max"}} in seconds, for the spans in the buffer."""
+        by_stage = {}
+        for stage, seconds, _ in self.snapshot():
+            by_stage.setdefault(stage, []).append(seconds)
+
+        stats = {}
+        for stage, values in by_stage.items():
+            values.sort()
+            stats[stage] = {
+                "count": len(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1]
+            }
+        return stats
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "stage", "ms"])
+            for stage, seconds, wall in self.snapshot():
+                writer.writerow([_format_wall(wall), stage, f"{seconds * 1000:.3f}"])
+
+    def export_json(self, path):
+        report = {
+            "stats_ms": {
+                stage: {key: (value if key == "count" else value * 1000) for key, value in values.items()}
+                for stage, values in self.stats().items()
+            },
+            "spans": [
+                {"time": _format_wall(wall), "stage": stage, "ms": seconds * 1000}
+                for stage, seconds, wall in self.snapshot()
+            ]
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def _format_wall(wall):
+    return datetime.fromtimestamp(wall).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+timings = Timings()
@@ -1,12 +1,17 @@
+import time
 import tkinter as tk
-from tkinter import messagebox, PhotoImage
+from tkinter import messagebox, filedialog, PhotoImage
 from tkinter import ttk
 from dataManager import DataManager
-from effscanner import EFFScanner
+from effscanner import read_batch_ids
 from ScannedTicketTable import ScannedTicketTable
 from effDataTableGUI import EffDataTableGUI
 from config_manager import ConfigManager
-from datetime import datetime
+from LISwatcher import LISWatcher
+from LISmanager import LISmanager
+from performancePanel import PerformancePanel
+from timing import timings
+from scanWorker import ScanWorker
 
 
 class EFFApp:
@@ -31,20 +36,42 @@ class EFFApp:
         # Create the Menu Bar on the top left corner of the window
         menubar = tk.Menu(self.root)
         file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="Reset EFF Data", command=self.reset_eff_data)
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Close Shift / Reset EFF Data", command=self.reset_eff_data)
+        file_menu.add_command(label="Export JSON...", command=self.export_json)
+        file_menu.add_command(label="Import JSON...", command=self.import_json)
+        file_menu.add_command(label="Rebuild Totals", command=self.rebuild_totals)
+        file_menu.add_command(label="Exit", command=self.exit_app)
         menubar.add_cascade(label="File", menu=file_menu)
         # Help Menu -----------------------------------#
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="About", command=lambda: tk.messagebox.showinfo("About", "Jeldwen EFF Scanner GUI v1.0\n by Kyle Brewer \nSoftware Engineer"))
         help_menu.add_command(label="Settings", command=self.open_settings)
+        help_menu.add_command(label="Performance...", command=lambda: self.performance_panel.show())
         menubar.add_cascade(label="Help", menu=help_menu)
         self.root.config(menu=menubar)
         #--------------------------------------------------#
 
+        timings.enabled = self.config.timing_enabled
+        self.performance_panel = PerformancePanel(self.root, self.config)
+
         self.data_manager = DataManager() # Initialize the DataManager so it can be used throughout the app
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
+
+        # Scans run on a worker thread; results come back through root.after
+        self.scan_worker = ScanWorker(self.root, self.data_manager)
+
+        # Pre-parse .LIS files in the background as they land in the data folder
+        self.lis_watcher = None
+        if self.config.data_folder and self.config.lis_watch_interval > 0:
+            self.lis_watcher = LISWatcher(self.config.data_folder, self.config.lis_watch_interval)
+            self.lis_watcher.start()
+
+        # Zip old .LIS files out of the data folder on a schedule
+        self.lis_manager = None
+        if self.config.data_folder and self.config.lis_retention_interval > 0:
+            self.lis_manager = LISmanager(self.config)
+            self.lis_manager.start()
 
-        self.scanned_tickets = self.data_manager.get_ticket_history() 
         self.effDataTable = EffDataTableGUI(self.root, self.startup_frame, self.data_manager) # Initialize the EffDataTableGUI for displaying EFF data
          
         self.scannedTicketTable = ScannedTicketTable(
@@ -61,11 +88,13 @@ class EFFApp:
         # Main menu UI Buttons ---------------------------------------------------#
         tk.Label(self.startup_frame, text="Choose an option on the menu:", font=("Arial", 14), bg="#1d446b", fg="white").pack(pady=10)
         tk.Button(self.startup_frame, text="Scan Ticket", width=25, command=self.show_scan_ui).pack(pady=5)
+        tk.Button(self.startup_frame, text="Bulk Scan", width=25, command=self.show_bulk_scan_ui).pack(pady=5)
         tk.Button(self.startup_frame, text="See EFF's Scanned Data", width=25, command=self.effDataTable.show_data_ui).pack(pady=5)
         tk.Button(self.startup_frame, text="Prev-Scanned Tickets", width=25, command=self.scannedTicketTable.show_scanned_tickets_ui).pack(pady=5)
         #--------------------------------------------------#
         
         self.scan_frame = None
+        self.bulk_frame = None
         self.data_frame = None
         
         
@@ -106,82 +135,146 @@ class EFFApp:
             messagebox.showerror("Error", "Data folder path is not set. Please configure it in the settings.")
             return
 
-        scanner = EFFScanner(folder_path, batch_id)
-        scanner.find_ticket()
-
-        extended_df = scanner.get_tickets()
-        if not extended_df.empty:
-            updated_keys = []
-            for _, row in extended_df.iterrows():
-                try:
-                    quantity = int(row["quantity"])
-                except Exception:
-                    quantity = 1
-
-                frame_code = row["frame_code"]
-                door_size = row["door_size"]
-
-                ticket = row.to_dict()
-                ticket["batch_id"] = batch_id
-                ticket["quantity"] = quantity
-                ticket["scan_time"] = datetime.now().strftime(" %H:%M:%S")
-
-                # Duplicate check here
-                is_duplicate = any(
-                    t.get("batch_id") == ticket["batch_id"] and
-                    t.get("item_number") == ticket.get("item_number") and
-                    t.get("order_number") == ticket.get("order_number")
-                    for t in self.data_manager.get_ticket_history()
-                )
-                if is_duplicate:
-                    self.status.config(
-                        text="❌ Ticket already scanned for this shift.",
-                        fg="red",
-                        font=("Arial", 20, "bold")
-                    )
-                    continue  # Skip adding this ticket
-
-                self.data_manager.add_ticket(ticket)      # save full data + categorize
-                self.scanned_tickets.append(ticket)       # used by the table GUI
-
-                key = self.data_manager.categorize_ticket(frame_code, door_size, quantity)
-                if key:
-                    updated_keys.append(f"{key} (+{quantity})")
-
-            keys_str = ", ".join(updated_keys)
-            if updated_keys:
-                self.status.config(
-                    text=f"✅ Ticket(s) processed.\nUpdated: {keys_str}",
-                    fg="green",
-                    font=("Arial", 20, "bold")
-                )
-            else:
-                self.status.config(
-                    text="❌ Ticket already scanned for this shift.",
-                    fg="red",
-                    font=("Arial", 20, "bold")
-                )
+        # Clear the entry right away so the next barcode can be typed while this one is processed
+        self.entry.delete(0, tk.END)
+        self.entry.focus()
+        self.status.config(text=f"⏳ Scanning {batch_id}...", fg="yellow", font=("Arial", 20, "bold"))
+        started = time.perf_counter()
+        self.scan_worker.submit(folder_path, [batch_id], lambda reports, error: self.on_scan_complete(reports, error, started))
+
+    def on_scan_complete(self, reports, error, started=None):
+        if error:
+            messagebox.showerror("Error", f"An error occurred while scanning:\n{error}")
+            return
+
+        report = reports[0]
+        with timings.span("ui.refresh"):
+            self.scannedTicketTable.apply_pending()
+            self.effDataTable.refresh_if_visible()
+        if started is not None:
+            timings.record("scan.total", time.perf_counter() - started)
+
+        # The scan screen may have been closed while the scan was running
+        if not (self.scan_frame and self.scan_frame.winfo_exists()):
+            return
+
+        if report["status"] == "added":
+            keys_str = ", ".join(report["updated"])
+            self.status.config(
+                text=f"✅ Ticket(s) processed.\nUpdated: {keys_str}",
+                fg="green",
+                font=("Arial", 20, "bold")
+            )
+        elif report["status"] == "duplicate":
+            self.status.config(
+                text="❌ Ticket already scanned for this shift.",
+                fg="red",
+                font=("Arial", 20, "bold")
+            )
         else:
             self.status.config(text="❌ Ticket not found.", fg="red", font=("Arial", 20, "bold"))
 
-        self.entry.delete(0, tk.END)
-        self.entry.focus()
         self.total_label.config(text=f"Total Doors: {self.data_manager.get_total()}")
 
 
+    def show_bulk_scan_ui(self):
+        self.startup_frame.pack_forget()
+        if self.bulk_frame:
+            self.bulk_frame.destroy()
+        self.bulk_frame = tk.Frame(self.root, bg="#1d446b")
+        self.bulk_frame.pack(padx=20, pady=20, fill="both", expand=True)
+
+        header_frame = tk.Frame(self.bulk_frame, bg="#1d446b")
+        header_frame.pack(fill="x")
+        tk.Label(header_frame, text="Paste Schedule Batches (one per line):", bg="#1d446b", fg="white", font=("Arial", 14)).pack(side="left", padx=10, pady=10)
+        tk.Button(header_frame, text="Back to the main menu", command=lambda: self.back_to_menu(self.bulk_frame)).pack(side="right", padx=10)
+
+        self.bulk_text = tk.Text(self.bulk_frame, width=40, height=10)
+        self.bulk_text.pack(padx=10, pady=5, fill="x")
+
+        btn_frame = tk.Frame(self.bulk_frame, bg="#1d446b")
+        btn_frame.pack(pady=5)
+        tk.Button(btn_frame, text="Load File...", command=self.load_bulk_file).pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Process", command=self.bulk_scan).pack(side="left", padx=5)
+
+        self.bulk_status = tk.Label(self.bulk_frame, text="", fg="yellow", bg="#1d446b", font=("Arial", 12, "bold"))
+        self.bulk_status.pack(pady=5)
+
+        self.bulk_tree = ttk.Treeview(self.bulk_frame, columns=("batch_id", "result", "updated"), show="headings", height=12)
+        self.bulk_tree.heading("batch_id", text="Batch ID")
+        self.bulk_tree.heading("result", text="Result")
+        self.bulk_tree.heading("updated", text="Updated")
+        self.bulk_tree.column("batch_id", width=140)
+        self.bulk_tree.column("result", width=140)
+        self.bulk_tree.column("updated", width=300)
+        self.bulk_tree.pack(padx=10, pady=5, fill="both", expand=True)
+
+    def load_bulk_file(self):
+        path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")], title="Load Batch IDs")
+        if not path:
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            self.bulk_text.delete("1.0", tk.END)
+            self.bulk_text.insert("1.0", f.read())
+
+    def bulk_scan(self):
+        batch_ids = read_batch_ids(self.bulk_text.get("1.0", tk.END))
+        if not batch_ids:
+            self.bulk_status.config(text="Please enter at least one schedule batch.", fg="red")
+            return
+
+        folder_path = self.config.data_folder
+        if not folder_path:
+            messagebox.showerror("Error", "Data folder path is not set. Please configure it in the settings.")
+            return
+
+        self.bulk_status.config(text=f"⏳ Processing {len(batch_ids)} batches...", fg="yellow")
+        self.scan_worker.submit(folder_path, batch_ids, self.on_bulk_scan_complete)
+
+    def on_bulk_scan_complete(self, reports, error):
+        if error:
+            messagebox.showerror("Error", f"An error occurred while scanning:\n{error}")
+            return
+
+        with timings.span("ui.refresh"):
+            self.scannedTicketTable.apply_pending()
+            self.effDataTable.refresh_if_visible()
+
+        if not (self.bulk_frame and self.bulk_frame.winfo_exists()):
+            return
+
+        results_text = {
+            "added": "✅ Added",
+            "duplicate": "❌ Already scanned",
+            "not_found": "❌ Ticket not found",
+            "file_not_found": "❌ File not found"
+        }
+        for row in self.bulk_tree.get_children():
+            self.bulk_tree.delete(row)
+        for report in reports:
+            self.bulk_tree.insert("", "end", values=(
+                report["batch_id"],
+                results_text.get(report["status"], report["status"]),
+                ", ".join(report["updated"])
+            ))
+
+        added = sum(1 for report in reports if report["status"] == "added")
+        self.bulk_status.config(
+            text=f"Processed {len(reports)} batches, {added} added. Total Doors: {self.data_manager.get_total()}",
+            fg="green" if added else "red"
+        )
+
     def reset_eff_data(self):
-        confirm = messagebox.askyesno("Confirm Reset", "Are you sure you want to delete all EFF data?")
+        confirm = messagebox.askyesno("Confirm Reset", "Close the current shift? Its EFF data will be archived and the totals reset.")
         if not confirm:
             return
         try:
       
-            self.data_manager.reset_data()
-
-            self.scanned_tickets.clear()
+            archive_path = self.data_manager.rollover_shift()
 
             
-            if self.scannedTicketTable and self.scannedTicketTable.tree:
-                self.scannedTicketTable.refresh_table()
+            if self.scannedTicketTable:
+                self.scannedTicketTable.apply_pending()
 
             if self.effDataTable and self.effDataTable.tree:
                 self.effDataTable.populate_tree(self.effDataTable.tree)
@@ -189,15 +282,80 @@ class EFFApp:
             if hasattr(self, "total_label"):
                 self.total_label.config(text=f"Total Doors: {self.data_manager.get_total()}")
 
+            if archive_path:
+                messagebox.showinfo("Shift Closed", f"Shift archived to:\n{archive_path}")
+
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while resetting data:\n{e}")
 
 
+    def export_json(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", title="Export EFF Data")
+        if not path:
+            return
+        try:
+            self.data_manager.export_json(path)
+            messagebox.showinfo("Exported", f"EFF data exported to:\n{path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while exporting data:\n{e}")
+
+    def import_json(self):
+        path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")], title="Import EFF Data")
+        if not path:
+            return
+        if not messagebox.askyesno("Confirm Import", "Replace the current EFF data with this file?"):
+            return
+        try:
+            self.data_manager.import_json(path)
+
+            if self.scannedTicketTable:
+                self.scannedTicketTable.apply_pending()
+
+            if self.effDataTable and self.effDataTable.tree:
+                self.effDataTable.populate_tree(self.effDataTable.tree)
+
+            if hasattr(self, "total_label"):
+                self.total_label.config(text=f"Total Doors: {self.data_manager.get_total()}")
+
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while importing data:\n{e}")
+
+    def rebuild_totals(self):
+        try:
+            drift = self.data_manager.rebuild_totals()
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while rebuilding totals:\n{e}")
+            return
+
+        if not drift:
+            messagebox.showinfo("Rebuild Totals", "Totals match the ticket history.")
+            return
+
+        if self.effDataTable and self.effDataTable.tree:
+            self.effDataTable.populate_tree(self.effDataTable.tree)
+        if hasattr(self, "total_label"):
+            self.total_label.config(text=f"Total Doors: {self.data_manager.get_total()}")
+
+        lines = [f"{key}: {stored} -> {rebuilt}" for key, (stored, rebuilt) in drift.items()]
+        messagebox.showinfo("Rebuild Totals", "Repaired drifted totals:\n" + "\n".join(lines))
+
     
     def back_to_menu(self, frame_to_destroy=None):
         if frame_to_destroy:
             frame_to_destroy.destroy()
         self.startup_frame.pack(padx=20, pady=20)
 
+    def exit_app(self):
+        self.scan_worker.stop()  # let queued scans finish before closing the data
+        if self.lis_watcher:
+            self.lis_watcher.stop()
+        if self.lis_manager:
+            self.lis_manager.stop()
+        self.data_manager.close()  # write queued changes and compact the journal before leaving
+        stats = self.data_manager.write_stats
+        print(f"Saved {stats['changes']} changes in {stats['writes']} writes "
+              f"({self.data_manager.coalesced_writes()} coalesced by write-behind)")
+        self.root.quit()
+
     def run_app(self):
         self.root.mainloop()